@@ -6,7 +6,7 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.database import get_db_manager
+from utils.database import get_db_manager, COLUMN_TYPES_QUERY, ML_PREDICTION_COLUMNS
 
 def apply_migration():
     """Apply the migration to add ML prediction columns"""
@@ -24,43 +24,22 @@ def apply_migration():
         migration_sql = f.read()
     
     try:
-        # Execute migration
-        print("\n📝 Executing migration SQL...")
-        db.execute_query(migration_sql, fetch=None)
-        
-        print("✅ Migration executed successfully!")
-        
-        # Verify columns were added
-        print("\n🔍 Verifying columns were added...")
-        
-        query = """
-            SELECT column_name, data_type 
-            FROM information_schema.columns 
-            WHERE table_name = 'cbc_results'
-            AND column_name IN (
-                'model_used', 
-                'cancer_probability_pct', 
-                'cancer_probability',
-                'healthy_probability',
-                'confidence_score',
-                'confidence_pct',
-                'risk_level',
-                'risk_color',
-                'prediction',
-                'prediction_label',
-                'model_loaded',
-                'model_load_error'
-            )
-            ORDER BY column_name
-        """
-        
-        results = db.execute_query(query, fetch='all')
+        # Run the migration and its verification on one connection so the
+        # check sees the uncommitted DDL and a failure rolls back both
+        with db.transaction() as cursor:
+            print("\n📝 Executing migration SQL...")
+            cursor.execute(migration_sql)
+            
+            print("✅ Migration executed successfully!")
+            
+            # Verify columns were added
+            print("\n🔍 Verifying columns were added...")
+            
+            cursor.execute(COLUMN_TYPES_QUERY, ('cbc_results', list(ML_PREDICTION_COLUMNS)))
+            results = cursor.fetchall()
         
         print("\n✅ New columns added:")
         for row in results:
-            if not isinstance(row, dict):
-                columns = ['column_name', 'data_type']
-                row = dict(zip(columns, row))
             print(f"  • {row['column_name']:30s} {row['data_type']}")
         
         print("\n" + "="*70)
@@ -18,17 +18,12 @@ query = """
     LIMIT 10
 """
 
-results = db.execute_query(query, fetch='all')
-
 print("\n" + "="*70)
 print("RECENT CBC RESULTS")
 print("="*70)
 
-for i, row in enumerate(results, 1):
-    if not isinstance(row, dict):
-        columns = ['id', 'wbc', 'nlr', 'hgb', 'mcv', 'plt', 'rdw', 'mono_abs', 'risk_score', 'created_at']
-        row = dict(zip(columns, row))
-    
+# Rows stream from the server, so the LIMIT can be raised for wider sweeps
+for i, row in enumerate(db.execute_query_iter(query), 1):
     print(f"\n{i}. CBC Result ID: {row['id']} (Created: {row['created_at']})")
     print(f"   WBC: {row['wbc']}, NLR: {row['nlr']}, HGB: {row['hgb']}")
     print(f"   MCV: {row['mcv']}, PLT: {row['plt']}, RDW: {row['rdw']}")
@@ -6,7 +6,7 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.database import get_db_manager
+from utils.database import get_db_manager, parse_json_field
 import json
 
 db = get_db_manager()
@@ -20,10 +20,6 @@ query = """
 result = db.execute_query(query, fetch='one')
 
 if result:
-    if not isinstance(result, dict):
-        columns = ['id', 'risk_interpretation', 'model_used', 'created_at']
-        result = dict(zip(columns, result))
-    
     print("\n" + "="*70)
     print(f"RECORD 74 - risk_interpretation CONTENT")
     print("="*70)
@@ -35,7 +31,7 @@ if result:
     
     if result['risk_interpretation']:
         try:
-            interp = json.loads(result['risk_interpretation'])
+            interp = parse_json_field(result['risk_interpretation'])
             print(json.dumps(interp, indent=2))
             
             print("\n" + "="*70)
@@ -6,8 +6,7 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.database import get_db_manager
-import json
+from utils.database import get_db_manager, parse_json_field
 
 db = get_db_manager()
 
@@ -26,11 +25,6 @@ print("RECENT CBC RECORDS - RISK SCORE VALUES")
 print("="*70)
 
 for result in results:
-    if not isinstance(result, dict):
-        columns = ['id', 'user_id', 'risk_score', 'cancer_probability_pct', 
-                   'cancer_probability', 'risk_interpretation', 'created_at']
-        result = dict(zip(columns, result))
-    
     print(f"\nRecord ID: {result['id']}")
     print(f"Created: {result['created_at']}")
     print(f"risk_score (DB field): {result['risk_score']}")
@@ -40,7 +34,7 @@ for result in results:
     # Parse risk_interpretation
     if result['risk_interpretation']:
         try:
-            interp = json.loads(result['risk_interpretation'])
+            interp = parse_json_field(result['risk_interpretation'])
             print(f"cancer_probability (in JSON): {interp.get('cancer_probability')}")
             print(f"cancer_probability_pct (in JSON): {interp.get('cancer_probability_pct')}")
         except:
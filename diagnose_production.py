@@ -3,11 +3,24 @@ Quick diagnostic script to check production database status
 Run this to see what needs to be fixed
 """
 
+import io
 import sys
+from contextlib import contextmanager, redirect_stdout
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.database import get_db_manager
+from utils.database import get_db_manager, parse_json_field
+
+@contextmanager
+def _buffered_section():
+    """Collect a report section's output and write it to stdout in one call"""
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            yield
+    finally:
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
 
 def diagnose_production():
     """Check what's wrong with the production database"""
@@ -18,125 +31,143 @@ def diagnose_production():
     
     db = get_db_manager()
     
-    # Check 1: Do ML columns exist?
-    print("\n1️⃣ CHECKING DATABASE SCHEMA...")
-    
+    # Checks 1 and 2 share one round-trip: the cbc_results schema, the five
+    # newest rows as JSON (SELECT * so missing columns don't fail it) and the
+    # NULL tallies over those rows
     query = """
-        SELECT column_name
+        WITH recent AS (
+            SELECT (row_number() OVER (ORDER BY t.created_at DESC))::int AS position,
+                   row_to_json(t) AS record
+            FROM (
+                SELECT * FROM cbc_results
+                ORDER BY created_at DESC
+                LIMIT 5
+            ) t
+        )
+        SELECT 'schema' AS kind, ordinal_position::int AS position, column_name::text AS value
         FROM information_schema.columns
         WHERE table_name = 'cbc_results'
-        AND column_name IN ('model_used', 'cancer_probability_pct')
+        UNION ALL
+        SELECT 'row', position, record::text
+        FROM recent
+        UNION ALL
+        SELECT 'summary', 0, json_build_object(
+            'records_without_model', COUNT(*) FILTER (WHERE record->>'model_used' IS NULL),
+            'records_with_null_pct', COUNT(*) FILTER (WHERE record->>'cancer_probability_pct' IS NULL)
+        )::text
+        FROM recent
     """
     
     try:
-        results = db.execute_query(query, fetch='all')
-        columns_found = [r[0] if isinstance(r, tuple) else r['column_name'] for r in results]
+        rows = db.execute_query(query, fetch='all')
+        rows.sort(key=lambda r: r['position'])
+        columns_found = [r['value'] for r in rows if r['kind'] == 'schema']
+        records = [parse_json_field(r['value']) for r in rows if r['kind'] == 'row']
+        summary = next(parse_json_field(r['value']) for r in rows if r['kind'] == 'summary')
+        diagnostic_error = None
+    except Exception as e:
+        columns_found, records, summary = [], [], {}
+        diagnostic_error = e
+    
+    with _buffered_section():
+        # Check 1: Do ML columns exist?
+        print("\n1️⃣ CHECKING DATABASE SCHEMA...")
         
-        if 'model_used' in columns_found:
-            print("   ✅ model_used column exists")
+        if diagnostic_error is not None:
+            print(f"   ❌ Error checking schema: {diagnostic_error}")
         else:
-            print("   ❌ model_used column MISSING - need to run migration")
+            if 'model_used' in columns_found:
+                print("   ✅ model_used column exists")
+            else:
+                print("   ❌ model_used column MISSING - need to run migration")
         
-        if 'cancer_probability_pct' in columns_found:
-            print("   ✅ cancer_probability_pct column exists")
-        else:
-            print("   ❌ cancer_probability_pct column MISSING - need to run migration")
+            if 'cancer_probability_pct' in columns_found:
+                print("   ✅ cancer_probability_pct column exists")
+            else:
+                print("   ❌ cancer_probability_pct column MISSING - need to run migration")
         
-        if len(columns_found) < 2:
-            print("\n   ⚠️  ACTION REQUIRED: Run 'python run_production_migration.py'")
-    except Exception as e:
-        print(f"   ❌ Error checking schema: {e}")
+            if 'model_used' not in columns_found or 'cancer_probability_pct' not in columns_found:
+                print("\n   ⚠️  ACTION REQUIRED: Run 'python run_production_migration.py'")
     
-    # Check 2: Are recent records using the model?
-    print("\n2️⃣ CHECKING RECENT CBC RECORDS...")
-    
-    query2 = """
-        SELECT id, risk_score, cancer_probability_pct, model_used, created_at
-        FROM cbc_results
-        ORDER BY created_at DESC
-        LIMIT 5
-    """
-    
-    try:
-        records = db.execute_query(query2, fetch='all')
+    with _buffered_section():
+        # Check 2: Are recent records using the model?
+        print("\n2️⃣ CHECKING RECENT CBC RECORDS...")
         
-        if not records:
+        if diagnostic_error is not None:
+            print(f"   ❌ Error checking records: {diagnostic_error}")
+        elif not records:
             print("   ℹ️  No records found")
         else:
-            records_without_model = 0
-            records_with_null_pct = 0
-            
+            records_without_model = summary['records_without_model']
+            records_with_null_pct = summary['records_with_null_pct']
+        
             for record in records:
-                if not isinstance(record, dict):
-                    columns = ['id', 'risk_score', 'cancer_probability_pct', 'model_used', 'created_at']
-                    record = dict(zip(columns, record))
-                
                 print(f"\n   Record {record['id']}:")
                 print(f"      Created: {record['created_at']}")
-                print(f"      risk_score: {record['risk_score']}")
-                print(f"      cancer_probability_pct: {record['cancer_probability_pct']}")
-                print(f"      model_used: {record['model_used']}")
-                
-                if record['model_used'] is None:
-                    records_without_model += 1
+                print(f"      risk_score: {record.get('risk_score')}")
+                print(f"      cancer_probability_pct: {record.get('cancer_probability_pct')}")
+                print(f"      model_used: {record.get('model_used')}")
+        
+                if record.get('model_used') is None:
                     print(f"      ❌ model_used is NULL")
                 else:
                     print(f"      ✅ model_used populated")
-                
-                if record['cancer_probability_pct'] is None:
-                    records_with_null_pct += 1
+        
+                if record.get('cancer_probability_pct') is None:
                     print(f"      ❌ cancer_probability_pct is NULL")
                 else:
                     print(f"      ✅ cancer_probability_pct populated")
-            
+        
             print(f"\n   Summary:")
             print(f"      {records_without_model} records without model")
             print(f"      {records_with_null_pct} records with NULL pct")
-            
+        
             if records_without_model > 0 or records_with_null_pct > 0:
                 print(f"\n   ⚠️  ACTION REQUIRED: Run 'python run_production_migration.py'")
-    except Exception as e:
-        print(f"   ❌ Error checking records: {e}")
     
-    # Check 3: Can we load the model?
-    print("\n3️⃣ CHECKING MODEL FILE...")
+    classifier = None
     
-    try:
-        from utils.cancer_classifier import get_classifier
-        classifier = get_classifier()
-        if classifier:
-            print("   ✅ CatBoost model loads successfully")
-        else:
-            print("   ❌ CatBoost model failed to load")
-    except Exception as e:
-        print(f"   ❌ Error loading model: {e}")
-    
-    # Check 4: Test prediction
-    print("\n4️⃣ TESTING MODEL PREDICTION...")
+    with _buffered_section():
+        # Check 3: Can we load the model?
+        print("\n3️⃣ CHECKING MODEL FILE...")
+        
+        try:
+            from utils.cancer_classifier import get_classifier
+            classifier = get_classifier()
+            if classifier:
+                print("   ✅ CatBoost model loads successfully")
+            else:
+                print("   ❌ CatBoost model failed to load")
+        except Exception as e:
+            print(f"   ❌ Error loading model: {e}")
     
-    try:
-        from utils.cancer_classifier import predict_cancer_risk
-        test_cbc = {
-            'WBC': 7.2,
-            'NLR': 2.5,
-            'HGB': 145.0,
-            'MCV': 88.0,
-            'PLT': 250.0,
-            'RDW': 13.2,
-            'MONO': 0.6
-        }
+    with _buffered_section():
+        # Check 4: Test prediction
+        print("\n4️⃣ TESTING MODEL PREDICTION...")
         
-        result = predict_cancer_risk(test_cbc)
+        try:
+            from utils.cancer_classifier import predict_cancer_risk
+            test_cbc = {
+                'WBC': 7.2,
+                'NLR': 2.5,
+                'HGB': 145.0,
+                'MCV': 88.0,
+                'PLT': 250.0,
+                'RDW': 13.2,
+                'MONO': 0.6
+            }
         
-        if result.get('model_used'):
-            print(f"   ✅ Prediction works")
-            print(f"      Model: {result.get('model_used')}")
-            print(f"      Risk: {result.get('cancer_probability_pct')}%")
-        else:
-            print(f"   ⚠️  Prediction fallback used")
-            print(f"      Risk: {result.get('cancer_probability_pct')}%")
-    except Exception as e:
-        print(f"   ❌ Error testing prediction: {e}")
+            result = predict_cancer_risk(test_cbc, classifier=classifier)
+        
+            if result.get('model_used'):
+                print(f"   ✅ Prediction works")
+                print(f"      Model: {result.get('model_used')}")
+                print(f"      Risk: {result.get('cancer_probability_pct')}%")
+            else:
+                print(f"   ⚠️  Prediction fallback used")
+                print(f"      Risk: {result.get('cancer_probability_pct')}%")
+        except Exception as e:
+            print(f"   ❌ Error testing prediction: {e}")
     
     print("\n" + "="*70)
     print("DIAGNOSTIC COMPLETE")
@@ -5,8 +5,8 @@ Fix RLS policies using Python and service role key
 import sys
 sys.path.insert(0, '.')
 
-from utils.supabase_client import get_supabase_admin
 from getpass import getpass
+from pathlib import Path
 
 def fix_rls_policies():
     print("\n" + "="*60)
@@ -16,7 +16,8 @@ def fix_rls_policies():
     print("\nThis will fix the Row-Level Security policies that are")
     print("blocking you from saving questionnaires and CBC results.")
     
-    # Get admin client
+    # Get admin client (imported lazily; supabase-py is slow to import)
+    from utils.supabase_client import get_supabase_admin
     admin = get_supabase_admin()
     if not admin:
         print("\n⚠️  No service role key found in secrets.")
@@ -32,84 +33,33 @@ def fix_rls_policies():
     
     print("\n✅ Connected with service role")
     
-    # SQL to fix RLS policies
-    sql_commands = [
-        # Drop old policies for questionnaires
-        "DROP POLICY IF EXISTS \"Users can only view their own questionnaires\" ON public.questionnaires;",
-        "DROP POLICY IF EXISTS \"Users can only insert their own questionnaires\" ON public.questionnaires;",
-        "DROP POLICY IF EXISTS \"Users can only update their own questionnaires\" ON public.questionnaires;",
-        "DROP POLICY IF EXISTS \"Users can only delete their own questionnaires\" ON public.questionnaires;",
-        
-        # Drop old policies for cbc_results
-        "DROP POLICY IF EXISTS \"Users can only view their own cbc_results\" ON public.cbc_results;",
-        "DROP POLICY IF EXISTS \"Users can only insert their own cbc_results\" ON public.cbc_results;",
-        "DROP POLICY IF EXISTS \"Users can only update their own cbc_results\" ON public.cbc_results;",
-        "DROP POLICY IF EXISTS \"Users can only delete their own cbc_results\" ON public.cbc_results;",
-        
-        # Enable RLS
-        "ALTER TABLE public.questionnaires ENABLE ROW LEVEL SECURITY;",
-        "ALTER TABLE public.cbc_results ENABLE ROW LEVEL SECURITY;",
-        
-        # Create new permissive policies for questionnaires
-        """CREATE POLICY "Allow authenticated users to insert their own questionnaires"
-           ON public.questionnaires FOR INSERT TO authenticated
-           WITH CHECK (auth.uid() = user_id);""",
-        
-        """CREATE POLICY "Allow authenticated users to view their own questionnaires"
-           ON public.questionnaires FOR SELECT TO authenticated
-           USING (auth.uid() = user_id);""",
-        
-        """CREATE POLICY "Allow authenticated users to update their own questionnaires"
-           ON public.questionnaires FOR UPDATE TO authenticated
-           USING (auth.uid() = user_id) WITH CHECK (auth.uid() = user_id);""",
-        
-        """CREATE POLICY "Allow authenticated users to delete their own questionnaires"
-           ON public.questionnaires FOR DELETE TO authenticated
-           USING (auth.uid() = user_id);""",
-        
-        # Create new permissive policies for cbc_results
-        """CREATE POLICY "Allow authenticated users to insert their own cbc_results"
-           ON public.cbc_results FOR INSERT TO authenticated
-           WITH CHECK (auth.uid() = user_id);""",
-        
-        """CREATE POLICY "Allow authenticated users to view their own cbc_results"
-           ON public.cbc_results FOR SELECT TO authenticated
-           USING (auth.uid() = user_id);""",
-        
-        """CREATE POLICY "Allow authenticated users to update their own cbc_results"
-           ON public.cbc_results FOR UPDATE TO authenticated
-           USING (auth.uid() = user_id) WITH CHECK (auth.uid() = user_id);""",
-        
-        """CREATE POLICY "Allow authenticated users to delete their own cbc_results"
-           ON public.cbc_results FOR DELETE TO authenticated
-           USING (auth.uid() = user_id);""",
-        
-        # Grant permissions
-        "GRANT ALL ON public.questionnaires TO authenticated;",
-        "GRANT ALL ON public.cbc_results TO authenticated;",
-        "GRANT ALL ON public.questionnaires TO service_role;",
-        "GRANT ALL ON public.cbc_results TO service_role;",
-    ]
+    # SQL to fix RLS policies (drops old policies, enables RLS, creates new ones, grants)
+    combined_sql = (Path(__file__).parent / 'migrations' / 'fix_rls_policies.sql').read_text()
     
     print("\n🔧 Executing SQL commands...")
     
-    # Execute via REST API (PostgREST doesn't support direct SQL)
-    import requests
-    
-    url = "https://kqzmwzosluljckadthup.supabase.co"
-    service_key = admin.supabase_key
-    
-    # Combine all SQL into one command
-    combined_sql = "\n".join(sql_commands)
-    
-    print("\n📋 Since direct SQL execution isn't available via Python,")
-    print("please run this in your Supabase SQL Editor:")
-    print("\n" + "="*60)
-    print(combined_sql)
-    print("="*60)
+    # Send the whole script in a single RPC round-trip
+    try:
+        admin.rpc('exec_sql', {'query': combined_sql}).execute()
+        print("✅ Applied migrations/fix_rls_policies.sql")
+        print("\nYour app will now be able to save data!")
+        return True
+    except Exception as e:
+        if getattr(e, 'code', None) != 'PGRST202':
+            # exec_sql exists, so this is the SQL itself failing
+            print(f"❌ SQL execution failed: {getattr(e, 'message', None) or e}")
+            return False
+        print("⚠️  Direct SQL execution via RPC not available (no exec_sql function)")
     
-    print("\n🌐 Open: https://supabase.com/dashboard/project/kqzmwzosluljckadthup/sql/new")
-    print("\nAfter running the SQL, your app will be able to save data!")
+    # The RPC already runs in one transaction; make the manual script atomic too
+    rule = "="*60
+    sys.stdout.write(
+        "\n📋 Please run this in your Supabase SQL Editor:\n"
+        f"\n{rule}\nBEGIN;\n{combined_sql}\nCOMMIT;\n{rule}\n"
+        "\n🌐 Open: https://supabase.com/dashboard/project/kqzmwzosluljckadthup/sql/new\n"
+        "\nAfter running the SQL, your app will be able to save data!\n"
+    )
+    sys.stdout.flush()
     
     return None
 
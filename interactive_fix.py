@@ -6,90 +6,49 @@ This will prompt you for the service role key and fix the database
 import sys
 import os
 from getpass import getpass
+from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from supabase import create_client
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared keep-alive session for Supabase REST calls. POSTs are retried only
+# on 429/503, where the request was rejected before running; a 502/504 can
+# arrive after the repair SQL committed, and its DROP VIEW fails when re-run.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=5,
+    pool_maxsize=15,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 503],
+        allowed_methods=frozenset(["POST"]),
+    ),
+))
+
+def _print_manual_sql(sql: str):
+    """Show the repair SQL for the SQL Editor in a single stdout write"""
+    rule = "=" * 60
+    sys.stdout.write(f"\n📋 Please run this SQL manually in Supabase SQL Editor:\n{rule}\n{sql}\n{rule}\n")
+    sys.stdout.flush()
 
 def fix_user_profiles_table(service_key: str):
     """Fix the user_profiles table using service role key"""
     
     url = "https://kqzmwzosluljckadthup.supabase.co"
     
-    print("\n🔧 Connecting to Supabase with service role...")
-    try:
-        admin = create_client(url, service_key)
-        print("✅ Connected successfully")
-    except Exception as e:
-        print(f"❌ Connection failed: {e}")
-        return False
-    
     # SQL to restore the table
-    sql = """
-DO $$
-BEGIN
-    -- Drop the broken view
-    DROP VIEW IF EXISTS public.user_profiles CASCADE;
-    
-    -- Restore from backup if it exists
-    IF EXISTS (
-        SELECT 1 FROM pg_tables 
-        WHERE schemaname = 'public' 
-        AND tablename = 'user_profiles_table_backup'
-    ) THEN
-        ALTER TABLE public.user_profiles_table_backup RENAME TO user_profiles;
-        RAISE NOTICE 'Restored from backup';
-    END IF;
-    
-    -- Create table if it doesn't exist
-    CREATE TABLE IF NOT EXISTS public.user_profiles (
-        id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
-        username TEXT UNIQUE,
-        display_name TEXT,
-        avatar_url TEXT,
-        bio TEXT,
-        created_at TIMESTAMPTZ DEFAULT NOW(),
-        updated_at TIMESTAMPTZ DEFAULT NOW()
-    );
-    
-    -- Create index
-    CREATE INDEX IF NOT EXISTS idx_user_profiles_username 
-    ON public.user_profiles(username);
-    
-    -- Create updated_at trigger
-    CREATE OR REPLACE FUNCTION public.handle_user_profiles_updated_at()
-    RETURNS TRIGGER AS $func$
-    BEGIN
-        NEW.updated_at = NOW();
-        RETURN NEW;
-    END;
-    $func$ LANGUAGE plpgsql;
-    
-    DROP TRIGGER IF EXISTS set_user_profiles_updated_at ON public.user_profiles;
-    CREATE TRIGGER set_user_profiles_updated_at
-        BEFORE UPDATE ON public.user_profiles
-        FOR EACH ROW
-        EXECUTE FUNCTION public.handle_user_profiles_updated_at();
-    
-    -- Disable RLS for now (we can re-enable with proper policies later)
-    ALTER TABLE public.user_profiles DISABLE ROW LEVEL SECURITY;
-    
-    -- Grant permissions
-    GRANT ALL ON public.user_profiles TO authenticated;
-    GRANT ALL ON public.user_profiles TO service_role;
-    GRANT ALL ON public.user_profiles TO anon;
-END
-$$;
-"""
+    sql = (Path(__file__).parent / 'migrations' / 'repair_user_profiles.sql').read_text()
     
     print("\n🔨 Executing repair SQL...")
     try:
         # Execute using postgrest-py - we need to use the SQL editor endpoint
         # Since postgrest doesn't have direct SQL execution, we'll use the REST API
-        import requests
-        
-        response = requests.post(
+        response = _SESSION.post(
             f"{url}/rest/v1/rpc/exec_sql",
             headers={
                 "apikey": service_key,
@@ -101,10 +60,7 @@ $$;
         
         if response.status_code == 404:
             print("⚠️  Direct SQL execution via RPC not available")
-            print("\n📋 Please run this SQL manually in Supabase SQL Editor:")
-            print("=" * 60)
-            print(sql)
-            print("=" * 60)
+            _print_manual_sql(sql)
             return None
         elif response.status_code >= 400:
             print(f"❌ SQL execution failed: {response.text}")
@@ -114,18 +70,25 @@ $$;
             
     except Exception as e:
         print(f"⚠️  Could not execute SQL automatically: {e}")
-        print("\n📋 Please run this SQL manually in Supabase SQL Editor:")
-        print("=" * 60)
-        print(sql)
-        print("=" * 60)
+        _print_manual_sql(sql)
         return None
     
     # Verify the fix
     print("\n✅ Verifying table is working...")
     try:
-        result = admin.table('user_profiles').select('*').limit(1).execute()
+        # HEAD with an exact count returns only headers (Content-Range: */N), no row payload
+        response = _SESSION.head(
+            f"{url}/rest/v1/user_profiles?select=id&limit=0",
+            headers={
+                "apikey": service_key,
+                "Authorization": f"Bearer {service_key}",
+                "Prefer": "count=exact"
+            }
+        )
+        response.raise_for_status()
+        profile_count = response.headers.get("Content-Range", "*/?").rsplit("/", 1)[-1]
         print(f"✅ Table is now accessible!")
-        print(f"   Found {len(result.data)} existing profiles")
+        print(f"   Found {profile_count} existing profiles")
         return True
     except Exception as e:
         print(f"❌ Table still not accessible: {e}")
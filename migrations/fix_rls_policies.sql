@@ -12,18 +12,22 @@ DROP POLICY IF EXISTS "Users can only delete their own questionnaires" ON public
 ALTER TABLE public.questionnaires ENABLE ROW LEVEL SECURITY;
 
 -- Create permissive policies for authenticated users
+-- (dropped first so the script can be re-run)
+DROP POLICY IF EXISTS "Allow authenticated users to insert their own questionnaires" ON public.questionnaires;
 CREATE POLICY "Allow authenticated users to insert their own questionnaires"
 ON public.questionnaires
 FOR INSERT
 TO authenticated
 WITH CHECK (auth.uid() = user_id);
 
+DROP POLICY IF EXISTS "Allow authenticated users to view their own questionnaires" ON public.questionnaires;
 CREATE POLICY "Allow authenticated users to view their own questionnaires"
 ON public.questionnaires
 FOR SELECT
 TO authenticated
 USING (auth.uid() = user_id);
 
+DROP POLICY IF EXISTS "Allow authenticated users to update their own questionnaires" ON public.questionnaires;
 CREATE POLICY "Allow authenticated users to update their own questionnaires"
 ON public.questionnaires
 FOR UPDATE
@@ -31,6 +35,7 @@ TO authenticated
 USING (auth.uid() = user_id)
 WITH CHECK (auth.uid() = user_id);
 
+DROP POLICY IF EXISTS "Allow authenticated users to delete their own questionnaires" ON public.questionnaires;
 CREATE POLICY "Allow authenticated users to delete their own questionnaires"
 ON public.questionnaires
 FOR DELETE
@@ -48,18 +53,22 @@ DROP POLICY IF EXISTS "Users can only delete their own cbc_results" ON public.cb
 ALTER TABLE public.cbc_results ENABLE ROW LEVEL SECURITY;
 
 -- Create permissive policies for authenticated users
+-- (dropped first so the script can be re-run)
+DROP POLICY IF EXISTS "Allow authenticated users to insert their own cbc_results" ON public.cbc_results;
 CREATE POLICY "Allow authenticated users to insert their own cbc_results"
 ON public.cbc_results
 FOR INSERT
 TO authenticated
 WITH CHECK (auth.uid() = user_id);
 
+DROP POLICY IF EXISTS "Allow authenticated users to view their own cbc_results" ON public.cbc_results;
 CREATE POLICY "Allow authenticated users to view their own cbc_results"
 ON public.cbc_results
 FOR SELECT
 TO authenticated
 USING (auth.uid() = user_id);
 
+DROP POLICY IF EXISTS "Allow authenticated users to update their own cbc_results" ON public.cbc_results;
 CREATE POLICY "Allow authenticated users to update their own cbc_results"
 ON public.cbc_results
 FOR UPDATE
@@ -67,6 +76,7 @@ TO authenticated
 USING (auth.uid() = user_id)
 WITH CHECK (auth.uid() = user_id);
 
+DROP POLICY IF EXISTS "Allow authenticated users to delete their own cbc_results" ON public.cbc_results;
 CREATE POLICY "Allow authenticated users to delete their own cbc_results"
 ON public.cbc_results
 FOR DELETE
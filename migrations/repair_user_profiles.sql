@@ -0,0 +1,64 @@
+-- Repair user_profiles: restore the TABLE (replacing the broken VIEW) in one DO block
+-- Applied by interactive_fix.py and fix_database.py through the exec_sql RPC;
+-- can also be run in the SQL Editor. Safe to re-run on an already repaired table
+
+DO $$
+BEGIN
+    -- Drop the broken view (DROP VIEW errors if user_profiles is already a table)
+    IF EXISTS (
+        SELECT 1 FROM pg_class
+        WHERE oid = to_regclass('public.user_profiles')
+        AND relkind = 'v'
+    ) THEN
+        DROP VIEW public.user_profiles CASCADE;
+    END IF;
+    
+    -- Restore from backup if it exists and nothing has replaced it yet
+    IF to_regclass('public.user_profiles') IS NULL AND EXISTS (
+        SELECT 1 FROM pg_tables 
+        WHERE schemaname = 'public' 
+        AND tablename = 'user_profiles_table_backup'
+    ) THEN
+        ALTER TABLE public.user_profiles_table_backup RENAME TO user_profiles;
+        RAISE NOTICE 'Restored from backup';
+    END IF;
+    
+    -- Create table if it doesn't exist
+    CREATE TABLE IF NOT EXISTS public.user_profiles (
+        id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+        username TEXT UNIQUE,
+        display_name TEXT,
+        avatar_url TEXT,
+        bio TEXT,
+        created_at TIMESTAMPTZ DEFAULT NOW(),
+        updated_at TIMESTAMPTZ DEFAULT NOW()
+    );
+    
+    -- Create index
+    CREATE INDEX IF NOT EXISTS idx_user_profiles_username 
+    ON public.user_profiles(username);
+    
+    -- Create updated_at trigger
+    CREATE OR REPLACE FUNCTION public.handle_user_profiles_updated_at()
+    RETURNS TRIGGER AS $func$
+    BEGIN
+        NEW.updated_at = NOW();
+        RETURN NEW;
+    END;
+    $func$ LANGUAGE plpgsql;
+    
+    DROP TRIGGER IF EXISTS set_user_profiles_updated_at ON public.user_profiles;
+    CREATE TRIGGER set_user_profiles_updated_at
+        BEFORE UPDATE ON public.user_profiles
+        FOR EACH ROW
+        EXECUTE FUNCTION public.handle_user_profiles_updated_at();
+    
+    -- Disable RLS for now (we can re-enable with proper policies later)
+    ALTER TABLE public.user_profiles DISABLE ROW LEVEL SECURITY;
+    
+    -- Grant permissions
+    GRANT ALL ON public.user_profiles TO authenticated;
+    GRANT ALL ON public.user_profiles TO service_role;
+    GRANT ALL ON public.user_profiles TO anon;
+END
+$$;
@@ -97,8 +97,8 @@ CREATE TABLE cbc_results (
 -- Create indexes for performance
 CREATE INDEX idx_users_username ON users(username);
 CREATE INDEX idx_users_email ON users(email);
-CREATE INDEX idx_questionnaires_user_id ON questionnaires(user_id);
-CREATE INDEX idx_cbc_results_user_id ON cbc_results(user_id);
+CREATE INDEX idx_questionnaires_user_submitted ON questionnaires(user_id, submitted_at DESC);
+CREATE INDEX idx_cbc_results_user_created ON cbc_results(user_id, created_at DESC);
 CREATE INDEX idx_cbc_results_questionnaire_id ON cbc_results(questionnaire_id);
 CREATE INDEX idx_cbc_results_created_at ON cbc_results(created_at);
 
@@ -6,12 +6,67 @@ HGB, MCV, MONO, NLR, PLT, RDW, WBC
 """
 
 import re
-import PyPDF2
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Optional
 import json
 
+from utils.pdf_cache import cached_extract_pdf_text
+
+# Patient info
+_NAME_RE = re.compile(r'Carnet santé\s+([A-Z]+)')
+_DATE_RE = re.compile(r'(\d{1,2}\s+\w+\s+\d{4},\s*\d{1,2}\s*h\s*\d{2})')
+_PRESCRIBER_RE = re.compile(r'Prescripteur\s+([A-Z\s\d]+)')
+_LAB_RE = re.compile(r'Laboratoire\s+([A-Z\s]+)')
+
+# Value lines: reference_range(unit)value unit
+# Examples: "4,5 -  11 (10*9/L)5,87  10*9/L", "135 -  175  (g/L)137  g/L"
+_VALUE_RES = {
+    '10*9/L': re.compile(r'[0-9,\.\s\-\(\)]+10\*9/L\)([0-9,\.]+)\s*10\*9/L'),
+    'g/L': re.compile(r'[0-9,\.\s\-\(\)]+g/L\)([0-9,\.]+)\s*g/L'),
+    '%': re.compile(r'[0-9,\.\s\-\(\)]+%\)([0-9,\.]+)\s*%'),
+    'fL': re.compile(r'[0-9,\.\s\-\(\)]+fL\)([0-9,\.]+)\s*fL'),
+}
+_ANY_VALUE_RE = re.compile(r'([0-9,\.]+)')
+# A whole trailing number with at most one decimal separator, so float() always
+# accepts it (runs like "1,2,3" never match)
+_TRAILING_NUMBER_RE = re.compile(r'(?<![0-9,\.])([0-9]+(?:[,\.][0-9]*)?)\s*$')
+
+# Every test name the line parser reacts to; lines without one are skipped
+_TEST_ANCHOR_RE = re.compile(
+    r'Leucocytes|Hémoglobine|Plaquettes|Monocytes|NEUTROPHILES %|LYMPHOCY ?TES %|Obser vation'
+)
+
+# Biomarkers the line parser can produce, in report order
+_CBC_KEYS = ('WBC', 'HGB', 'PLT', 'MONO', 'NEUT_PCT', 'LYMPH_PCT', 'MCV', 'RDW')
+
+# Missing-biomarker marker for the ML features (np.nan is this same plain float)
+_NAN = float('nan')
+_MISSING_ENTRY = {'value': _NAN}
+
+def _anchor_lines(text: str):
+    """Yield (line index, start offset) of each text line that contains a test anchor"""
+    line_no = 0
+    pos = 0
+    last = -1
+    for match in _TEST_ANCHOR_RE.finditer(text):
+        line_no += text.count('\n', pos, match.start())
+        pos = match.start()
+        if line_no != last:
+            last = line_no
+            yield line_no, text.rfind('\n', 0, pos) + 1
+
+def _window_lines(text: str, start: int, count: int = 4):
+    """Yield up to count stripped lines of text starting at offset start"""
+    for _ in range(count):
+        if start > len(text):
+            return
+        end = text.find('\n', start)
+        if end == -1:
+            end = len(text)
+        yield text[start:end].strip()
+        start = end + 1
+
 class QuebecHealthBookletExtractor:
     """Extractor specifically for Quebec Health Booklet format"""
     
@@ -30,11 +85,7 @@ class QuebecHealthBookletExtractor:
     def extract_from_pdf(self, file_path: str) -> Dict:
         """Extract CBC data from Quebec Health Booklet PDF"""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            text = cached_extract_pdf_text(file_path)
             
             # Extract patient info
             patient_info = self._extract_patient_info(text)
@@ -96,22 +147,22 @@ class QuebecHealthBookletExtractor:
         patient_info = {}
         
         # Patient name from "Carnet santé SHAYAN"
-        name_match = re.search(r'Carnet santé\s+([A-Z]+)', text)
+        name_match = _NAME_RE.search(text)
         if name_match:
             patient_info['name'] = name_match.group(1)
         
         # Collection date from "23 janvier 2024, 10 h 57"
-        date_match = re.search(r'(\d{1,2}\s+\w+\s+\d{4},\s*\d{1,2}\s*h\s*\d{2})', text)
+        date_match = _DATE_RE.search(text)
         if date_match:
             patient_info['collection_date'] = date_match.group(1)
         
         # Prescriber
-        prescriber_match = re.search(r'Prescripteur\s+([A-Z\s\d]+)', text)
+        prescriber_match = _PRESCRIBER_RE.search(text)
         if prescriber_match:
             patient_info['prescriber'] = prescriber_match.group(1).strip()
         
         # Laboratory
-        lab_match = re.search(r'Laboratoire\s+([A-Z\s]+)', text)
+        lab_match = _LAB_RE.search(text)
         if lab_match:
             patient_info['laboratory'] = lab_match.group(1).strip()
         
@@ -121,18 +172,22 @@ class QuebecHealthBookletExtractor:
         """Extract CBC values from Quebec Health Booklet format"""
         cbc_data = {}
         
-        # Parse line by line using the discovered pattern
-        lines = text.split('\n')
-        current_test = None
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
+        # Parse line by line using the discovered pattern, working on offsets
+        # into text so only the few lines around each anchor are sliced out
+        # One regex scan finds the candidate lines instead of testing every line.
+        # Later occurrences win, so walk them from the end, skip biomarkers that
+        # are already set and stop as soon as every one has been found.
+        for i, start in reversed(list(_anchor_lines(text))):
+            if len(cbc_data) == len(_CBC_KEYS):
+                break
+            line = next(_window_lines(text, start, 1))
             
             # Look for test names
             if 'Leucocytes' in line and 'Valeur de référence' not in line:
-                current_test = 'WBC'
+                if 'WBC' in cbc_data:
+                    continue
                 # Look ahead for the pattern: reference_range(unit)value unit
-                value = self._extract_quebec_value(lines, i, '10*9/L')
+                value = self._extract_quebec_value(text, start, '10*9/L')
                 if value:
                     cbc_data['WBC'] = {
                         'value': value,
@@ -143,8 +198,9 @@ class QuebecHealthBookletExtractor:
                     }
             
             elif 'Hémoglobine' in line and 'Valeur de référence' not in line and i < 60:  # First occurrence is HGB
-                current_test = 'HGB'
-                value = self._extract_quebec_value(lines, i, 'g/L')
+                if 'HGB' in cbc_data:
+                    continue
+                value = self._extract_quebec_value(text, start, 'g/L')
                 if value:
                     cbc_data['HGB'] = {
                         'value': value,
@@ -155,8 +211,9 @@ class QuebecHealthBookletExtractor:
                     }
             
             elif 'Plaquettes' in line and 'Valeur de référence' not in line:
-                current_test = 'PLT'
-                value = self._extract_quebec_value(lines, i, '10*9/L')
+                if 'PLT' in cbc_data:
+                    continue
+                value = self._extract_quebec_value(text, start, '10*9/L')
                 if value:
                     cbc_data['PLT'] = {
                         'value': value,
@@ -167,8 +224,9 @@ class QuebecHealthBookletExtractor:
                     }
             
             elif 'Monocytes' in line and 'MONOCYTES %' not in line and 'Valeur de référence' not in line:
-                current_test = 'MONO'
-                value = self._extract_quebec_value(lines, i, '10*9/L')
+                if 'MONO' in cbc_data:
+                    continue
+                value = self._extract_quebec_value(text, start, '10*9/L')
                 if value:
                     cbc_data['MONO'] = {
                         'value': value,
@@ -179,7 +237,9 @@ class QuebecHealthBookletExtractor:
                     }
             
             elif 'NEUTROPHILES %' in line:
-                value = self._extract_quebec_value(lines, i, '%')
+                if 'NEUT_PCT' in cbc_data:
+                    continue
+                value = self._extract_quebec_value(text, start, '%')
                 if value:
                     cbc_data['NEUT_PCT'] = {
                         'value': value,
@@ -190,7 +250,9 @@ class QuebecHealthBookletExtractor:
                     }
             
             elif 'LYMPHOCYTES %' in line or 'LYMPHOCY TES %' in line:
-                value = self._extract_quebec_value(lines, i, '%')
+                if 'LYMPH_PCT' in cbc_data:
+                    continue
+                value = self._extract_quebec_value(text, start, '%')
                 if value:
                     cbc_data['LYMPH_PCT'] = {
                         'value': value,
@@ -202,7 +264,9 @@ class QuebecHealthBookletExtractor:
             
             # Look for MCV and RDW in Observation sections
             elif 'Obser vation' in line and i > 60 and i < 90:  # MCV
-                value = self._extract_quebec_value(lines, i, 'fL')
+                if 'MCV' in cbc_data:
+                    continue
+                value = self._extract_quebec_value(text, start, 'fL')
                 if value:
                     cbc_data['MCV'] = {
                         'value': value,
@@ -213,108 +277,63 @@ class QuebecHealthBookletExtractor:
                     }
             
             elif 'Obser vation' in line and i > 70:  # RDW
-                # Look for pattern with no unit (just number)
-                for j in range(i, min(i + 4, len(lines))):
-                    check_line = lines[j].strip()
-                    rdw_match = re.search(r'([0-9,\.]+)\s*$', check_line)
-                    if rdw_match and 'Valeur de référence' not in check_line:
-                        try:
-                            value_str = rdw_match.group(1).replace(',', '.')
-                            value = float(value_str)
-                            if 10 < value < 20:  # RDW typical range
-                                cbc_data['RDW'] = {
-                                    'value': value,
-                                    'unit': '%',
-                                    'flag': '',
-                                    'reference_range': '12.7-16',
-                                    'original_name': 'Largeur de distribution érythrocytaire'
-                                }
-                                break
-                        except:
-                            continue
+                if 'RDW' in cbc_data:
+                    continue
+                value = self._extract_rdw_value(text, start)
+                if value:
+                    cbc_data['RDW'] = {
+                        'value': value,
+                        'unit': '%',
+                        'flag': '',
+                        'reference_range': '12.7-16',
+                        'original_name': 'Largeur de distribution érythrocytaire'
+                    }
         
-        return cbc_data
+        return {key: cbc_data[key] for key in _CBC_KEYS if key in cbc_data}
     
-    def _extract_quebec_value(self, lines: list, start_idx: int, expected_unit: str) -> Optional[float]:
+    def _extract_quebec_value(self, text: str, start: int, expected_unit: str) -> Optional[float]:
         """Extract value from Quebec Health Booklet format pattern: reference_range(unit)value unit"""
-        # Look in the next 4 lines for the pattern
-        for i in range(start_idx, min(start_idx + 4, len(lines))):
-            line = lines[i].strip()
+        # Look in the 4 lines from offset start for the pattern
+        for line in _window_lines(text, start):
             
             # Skip reference value lines without data
             if 'Valeur de référence' in line and expected_unit not in line:
                 continue
             
             # Look for the pattern: reference_range(unit)value unit
-            # Examples: "4,5 -  11 (10*9/L)5,87  10*9/L", "135 -  175  (g/L)137  g/L"
-            if expected_unit == '10*9/L':
-                # Pattern: reference_range(10*9/L)value 10*9/L
-                match = re.search(r'[0-9,\.\s\-\(\)]+10\*9/L\)([0-9,\.]+)\s*10\*9/L', line)
-            elif expected_unit == 'g/L':
-                # Pattern: reference_range(g/L)value g/L
-                match = re.search(r'[0-9,\.\s\-\(\)]+g/L\)([0-9,\.]+)\s*g/L', line)
-            elif expected_unit == '%':
-                # Pattern: reference_range(%)value %
-                match = re.search(r'[0-9,\.\s\-\(\)]+%\)([0-9,\.]+)\s*%', line)
-            elif expected_unit == 'fL':
-                # Pattern: reference_range(fL)value fL
-                match = re.search(r'[0-9,\.\s\-\(\)]+fL\)([0-9,\.]+)\s*fL', line)
-            else:
-                # General pattern
-                match = re.search(r'([0-9,\.]+)', line)
+            match = _VALUE_RES.get(expected_unit, _ANY_VALUE_RE).search(line)
             
             if match:
                 try:
                     value_str = match.group(1).replace(',', '.')
                     return float(value_str)
-                except:
+                except ValueError:
                     continue
         
         return None
     
-    def _extract_value_from_context(self, lines: list, start_idx: int, test_name: str, expected_unit: str) -> Optional[float]:
-        """Extract numerical value from surrounding lines"""
-        # Look in the next 3 lines for the value
-        for i in range(start_idx, min(start_idx + 4, len(lines))):
-            line = lines[i].strip()
-            
-            # Skip reference value lines
+    def _extract_rdw_value(self, text: str, start: int) -> Optional[float]:
+        """Extract RDW, which is printed as a bare number with no unit"""
+        # Look in the 4 lines from offset start for a number in the RDW range
+        for line in _window_lines(text, start):
             if 'Valeur de référence' in line:
                 continue
             
-            # Look for patterns like "5,87 10*9/L" or "137 g/L"
-            if expected_unit == '10*9/L':
-                match = re.search(r'([0-9,\.]+)\s*10\*9/L', line)
-            elif expected_unit == 'g/L':
-                match = re.search(r'([0-9,\.]+)\s*g/L', line)
-            elif expected_unit == '%':
-                match = re.search(r'([0-9,\.]+)\s*%', line)
-            else:
-                match = re.search(r'([0-9,\.]+)', line)
-            
+            match = _TRAILING_NUMBER_RE.search(line)
             if match:
-                try:
-                    value_str = match.group(1).replace(',', '.')
-                    return float(value_str)
-                except:
-                    continue
+                value = float(match.group(1).replace(',', '.'))
+                if 10 < value < 20:  # RDW typical range
+                    return value
         
         return None
     
     def _create_ml_features(self, cbc_data: Dict) -> Dict:
         """Create feature vector for ML model with the 7 required biomarkers"""
-        import numpy as np
-        
-        ml_features = {}
-        
         # Extract the 7 key biomarkers needed for ML model, using NaN for missing values
-        for biomarker in self.required_biomarkers.keys():
-            if biomarker in cbc_data:
-                ml_features[biomarker] = cbc_data[biomarker]['value']
-            else:
-                ml_features[biomarker] = np.nan
-        
-        return ml_features
+        return {
+            biomarker: cbc_data.get(biomarker, _MISSING_ENTRY)['value']
+            for biomarker in self.required_biomarkers
+        }
 
 def test_quebec_extractor():
     """Test the Quebec Health Booklet extractor"""
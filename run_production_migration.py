@@ -7,7 +7,10 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.database import get_db_manager
+from utils.database import get_db_manager, ML_PREDICTION_COLUMNS
+
+# Rows fetched and scored per round-trip when re-processing old records
+MIGRATION_BATCH_SIZE = 500
 
 def run_production_migration():
     """
@@ -23,81 +26,70 @@ def run_production_migration():
     # Step 1: Add ML prediction columns
     print("\n📝 Step 1: Adding ML prediction columns to cbc_results table...")
     
-    migration_sql = """
-    -- Add model_used column to track which model made the prediction
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS model_used VARCHAR(255);
-
-    -- Add cancer_probability_pct for storing percentage (0-100)
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS cancer_probability_pct REAL;
-
-    -- Add other useful ML prediction columns
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS cancer_probability DOUBLE PRECISION;
-
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS healthy_probability DOUBLE PRECISION;
-
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS confidence_score DOUBLE PRECISION;
-
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS confidence_pct REAL;
-
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS risk_level VARCHAR(50);
-
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS risk_color VARCHAR(50);
-
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS prediction INTEGER;
-
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS prediction_label VARCHAR(100);
-
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS model_loaded BOOLEAN;
-
-    ALTER TABLE cbc_results 
-    ADD COLUMN IF NOT EXISTS model_load_error TEXT;
-    """
+    # Only touch the columns that are actually missing, all in one ALTER/transaction
+    existing_columns = set(db.get_table_columns('cbc_results'))
+    missing_columns = [
+        (name, sql_type) for name, sql_type in ML_PREDICTION_COLUMNS.items()
+        if name not in existing_columns
+    ]
     
-    try:
-        db.execute_query(migration_sql, fetch=None)
-        print("   ✅ Columns added successfully")
-    except Exception as e:
-        print(f"   ❌ Error adding columns: {e}")
-        print("   Note: This is OK if columns already exist")
+    if not missing_columns:
+        print("   ✅ All ML prediction columns already exist")
+    else:
+        try:
+            with db.transaction() as cursor:
+                if db.db_type == 'postgresql':
+                    cursor.execute(
+                        "ALTER TABLE cbc_results\n" + ",\n".join(
+                            f"ADD COLUMN IF NOT EXISTS {name} {sql_type}"
+                            for name, sql_type in missing_columns
+                        )
+                    )
+                else:
+                    # SQLite only allows one ADD COLUMN per ALTER TABLE; run them
+                    # in one explicit transaction so they share a single commit
+                    cursor.executescript("BEGIN IMMEDIATE;\n" + "".join(
+                        f"ALTER TABLE cbc_results ADD COLUMN {name} {sql_type};\n"
+                        for name, sql_type in missing_columns
+                    ) + "COMMIT;")
+            db.add_cached_columns('cbc_results', [name for name, _ in missing_columns])
+            print(f"   ✅ Added {len(missing_columns)} columns successfully")
+        except Exception as e:
+            print(f"   ❌ Error adding columns: {e}")
     
     # Step 2: Re-process existing records
-    print("\n📝 Step 2: Re-processing recent CBC records with CatBoost model...")
+    print("\n📝 Step 2: Re-processing CBC records with CatBoost model...")
     
-    query = """
+    # Keyset pagination on id: rows that are skipped or fail to update keep
+    # model_used NULL, so an offset/"first N" query would keep returning them
+    placeholder = "%s" if db.db_type == 'postgresql' else "?"
+    query = f"""
         SELECT id, wbc, nlr, hgb, mcv, plt, rdw, mono_abs
         FROM cbc_results
-        WHERE model_used IS NULL
-        ORDER BY created_at DESC
-        LIMIT 10
+        WHERE model_used IS NULL AND id > {placeholder}
+        ORDER BY id
+        LIMIT {MIGRATION_BATCH_SIZE}
     """
     
-    records = db.execute_query(query, fetch='all')
+    from utils.cancer_classifier import get_classifier, predict_cancer_risk_batch
+    from utils.database import update_cbc_predictions_batch
     
-    if not records:
-        print("   ✅ No records need updating")
-    else:
-        from utils.cancer_classifier import predict_cancer_risk
-        from utils.database import update_cbc_predictions
+    # Load the model once for the whole run
+    classifier = get_classifier()
+    
+    # Re-uploaded reports share the same CBC vector; run inference once per vector
+    predictions = {}
+    
+    updated_count = 0
+    last_id = 0
+    while True:
+        records = db.execute_query(query, (last_id,), fetch='all')
+        if not records:
+            break
+        last_id = records[-1]['id']
         
-        updated_count = 0
+        batch = []
         for record in records:
-            if not isinstance(record, dict):
-                columns = ['id', 'wbc', 'nlr', 'hgb', 'mcv', 'plt', 'rdw', 'mono_abs']
-                record = dict(zip(columns, record))
-            
-            record_id = record['id']
-            
             # Build CBC data
             cbc_data = {
                 'WBC': record.get('wbc'),
@@ -113,22 +105,33 @@ def run_production_migration():
             cbc_data = {k: v for k, v in cbc_data.items() if v is not None}
             
             if len(cbc_data) >= 3:  # Need at least 3 values
-                try:
-                    # Run prediction
-                    prediction = predict_cancer_risk(cbc_data)
-                    
-                    # Update database
-                    success = update_cbc_predictions(record_id, prediction)
-                    
-                    if success:
-                        updated_count += 1
-                        print(f"   ✅ Updated record {record_id}: {prediction.get('cancer_probability_pct')}% risk")
-                    else:
-                        print(f"   ⚠️  Failed to update record {record_id}")
-                except Exception as e:
-                    print(f"   ❌ Error processing record {record_id}: {e}")
+                batch.append((record['id'], tuple(sorted(cbc_data.items())), cbc_data))
+        
+        # Score every vector not seen yet with a single model call
+        new_vectors = {}
+        for _, cache_key, cbc_data in batch:
+            if cache_key not in predictions:
+                new_vectors.setdefault(cache_key, cbc_data)
+        if new_vectors:
+            predictions.update(zip(
+                new_vectors,
+                predict_cancer_risk_batch(list(new_vectors.values()), classifier)
+            ))
         
+        # Write the whole batch back in one transaction
+        updates = [(record_id, predictions[cache_key]) for record_id, cache_key, _ in batch]
+        if updates:
+            batch_updated = update_cbc_predictions_batch(updates)
+            updated_count += batch_updated
+            if batch_updated:
+                print(f"   ✅ Updated {batch_updated} records (ids up to {last_id})")
+            else:
+                print(f"   ⚠️  Failed to update {len(updates)} records (ids up to {last_id})")
+    
+    if last_id:
         print(f"\n   ✅ Updated {updated_count} records")
+    else:
+        print("   ✅ No records need updating")
     
     print("\n" + "="*70)
     print("✅ PRODUCTION MIGRATION COMPLETE")
@@ -7,13 +7,8 @@ Main Streamlit application with persistent authentication and storage
 import streamlit as st
 import sys
 from pathlib import Path
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
 import json
-import time
 from typing import Any, Optional
 
 # Add project root to path for imports
@@ -22,18 +17,15 @@ sys.path.append(str(project_root))
 
 from utils.auth import (
     init_auth, check_authentication, register_user, authenticate_user, 
-    logout, get_user_data, save_questionnaire,
+    logout, get_user_data, save_questionnaire, delete_questionnaire,
     request_password_reset, update_password, get_current_user,
     delete_user_account_and_data
 )
 from utils.database import (
-    save_cbc_data, get_cbc_data_for_prediction, update_cbc_predictions
+    save_cbc_data, get_cbc_data_for_prediction, update_cbc_predictions,
+    build_cbc_result_record
 )
 from utils.navigation import setup_navigation
-from utils.ml_model import (
-    extract_cbc_from_pdf, get_biomarker_analysis, get_risk_interpretation
-)
-from utils.cancer_classifier import predict_cancer_risk
 
 
 def _render_dataframe(data, **kwargs):
@@ -45,6 +37,36 @@ def _render_plotly_chart(fig):
     """Render plotly charts with stretch width using config parameter."""
     st.plotly_chart(fig, config={'displayModeBar': False}, width='stretch')
 
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _build_risk_gauge(risk_score: float, gauge_color: str):
+    """Build the dashboard risk gauge; reruns with the same score reuse the figure"""
+    # Only the dashboard draws charts, so plotly is not loaded for the other pages
+    import plotly.graph_objects as go
+    
+    fig_gauge = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = risk_score,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Cancer Risk Score", 'font': {'size': 24}},
+        number = {'suffix': "%", 'font': {'size': 40}, 'valueformat': '.2f'},
+        gauge = {
+            'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "darkblue"},
+            'bar': {'color': gauge_color},
+            'bgcolor': "white",
+            'borderwidth': 2,
+            'bordercolor': "gray",
+            'steps': [
+                {'range': [0, 10], 'color': "lightgreen"},
+                {'range': [10, 30], 'color': "yellow"},
+                {'range': [30, 60], 'color': "orange"},
+                {'range': [60, 100], 'color': "lightcoral"}],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 80}}))
+    fig_gauge.update_layout(height=350, font={'color': "darkblue", 'family': "Arial"})
+    return fig_gauge
+
 def init_session_state():
     """Initialize session state variables"""
     if 'current_page' not in st.session_state:
@@ -146,8 +168,7 @@ def show_landing_page():
                             st.session_state.username = username
                             st.session_state.user_id = user_id
                             st.session_state.user_data = get_user_data(user_id)
-                            st.success("✅ Login successful!")
-                            time.sleep(1)
+                            st.session_state.flash_message = "✅ Login successful!"
                             st.rerun()
                         else:
                             st.error(f"❌ {error_msg}")
@@ -240,6 +261,11 @@ def show_landing_page():
 
 def show_questionnaire_page():
     """Questionnaire and file upload page"""
+    # Extraction and the CatBoost model are only needed here; importing them
+    # lazily keeps them off the landing page's cold start
+    from utils.ml_model import extract_cbc_from_pdf
+    from utils.cancer_classifier import predict_cancer_risk
+
     st.title("📋 Health Assessment")
     
     # Check if user already has a questionnaire
@@ -433,9 +459,6 @@ def show_questionnaire_page():
                 'submission_time': datetime.now().isoformat()
             }
             
-            # Save to database
-            questionnaire_id = save_questionnaire(st.session_state.user_id, questionnaire_data)
-            
             manual_cbc_data = None
             if manual_inputs is not None:
                 manual_cbc_data = {}
@@ -490,6 +513,14 @@ def show_questionnaire_page():
                             'raw_extraction_data': cbc_data
                         }
                     
+                    if not any(value is not None for value in cbc_data.values()):
+                        st.error("❌ No CBC values could be read from your report. Please check the file or enter the values manually.")
+                        st.stop()
+                    
+                    # Save the questionnaire only once the CBC input is known to be usable,
+                    # so rejected submissions don't leave questionnaires without results
+                    questionnaire_id = save_questionnaire(st.session_state.user_id, questionnaire_data)
+                    
                     # STEP 2: Save CBC data to database FIRST
                     cbc_result_id = save_cbc_data(
                         st.session_state.user_id,
@@ -501,6 +532,10 @@ def show_questionnaire_page():
                     )
                     
                     if not cbc_result_id:
+                        # The questionnaire goes through the Supabase client and the CBC row
+                        # through DatabaseManager, so no transaction covers both inserts
+                        if questionnaire_id:
+                            delete_questionnaire(questionnaire_id)
                         st.error("❌ Failed to save CBC data to database")
                         st.stop()
                     
@@ -543,18 +578,30 @@ def show_questionnaire_page():
                     if not prediction_success:
                         st.warning("⚠️ CBC data saved but predictions could not be stored")
                 
-                # Update session state
-                st.session_state.user_data = get_user_data(st.session_state.user_id)
+                # Update session state from what was just written; only re-read
+                # when a write did not go through and the stored rows may differ
+                if questionnaire_id and prediction_success:
+                    st.session_state.user_data = {
+                        'has_questionnaire': True,
+                        'questionnaire': {'id': questionnaire_id, **questionnaire_data},
+                        'has_cbc_results': True,
+                        'cbc_results': build_cbc_result_record(
+                            cbc_result_id, cbc_data_from_db, detailed_prediction, metadata
+                        )
+                    }
+                else:
+                    st.session_state.user_data = get_user_data(st.session_state.user_id)
                 
-                st.success("✅ Assessment and CBC analysis completed successfully!")
-                st.balloons()
-                time.sleep(2)
+                st.session_state.flash_message = "✅ Assessment and CBC analysis completed successfully!"
+                st.session_state.flash_balloons = True
                 st.rerun()
             else:
                 st.warning("Please either enter the 7 key values manually OR upload your CBC report to complete the assessment")
 
 def show_dashboard_page():
     """User profile page with data visualization panel"""
+    from utils.ml_model import get_risk_interpretation
+
     st.title(f"🏥 Dashboard - Welcome {st.session_state.username}")
     
     user_data = st.session_state.user_data
@@ -628,28 +675,7 @@ def show_dashboard_page():
     with col2:
         gauge_color = "red" if risk_score > 50 else "orange" if risk_score > 20 else "green"
         
-        fig_gauge = go.Figure(go.Indicator(
-            mode = "gauge+number",
-            value = risk_score,
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "Cancer Risk Score", 'font': {'size': 24}},
-            number = {'suffix': "%", 'font': {'size': 40}, 'valueformat': '.2f'},
-            gauge = {
-                'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "darkblue"},
-                'bar': {'color': gauge_color},
-                'bgcolor': "white",
-                'borderwidth': 2,
-                'bordercolor': "gray",
-                'steps': [
-                    {'range': [0, 10], 'color': "lightgreen"},
-                    {'range': [10, 30], 'color': "yellow"},
-                    {'range': [30, 60], 'color': "orange"},
-                    {'range': [60, 100], 'color': "lightcoral"}],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 80}}))
-        fig_gauge.update_layout(height=350, font={'color': "darkblue", 'family': "Arial"})
+        fig_gauge = _build_risk_gauge(risk_score, gauge_color)
         _render_plotly_chart(fig_gauge)
     
     st.markdown(f"""
@@ -705,6 +731,8 @@ def show_dashboard_page():
         'MONO': 'mono_abs'
     }
     
+    missing_upper = {f.upper() for f in missing_features}
+    
     table_data = []
     for feature_key in ['WBC', 'HGB', 'MCV', 'PLT', 'RDW', 'NLR', 'MONO']:
         unit, full_name = feature_metadata[feature_key]
@@ -717,7 +745,7 @@ def show_dashboard_page():
         model_value = model_features.get(feature_key) if model_features else None
         
         # Determine source
-        is_imputed = feature_key.upper() in [f.upper() for f in missing_features]
+        is_imputed = feature_key in missing_upper
         
         if extracted_value is not None:
             extracted_display = f"{extracted_value:.2f}"
@@ -788,6 +816,46 @@ def show_dashboard_page():
                 'imputed_count': detailed_prediction.get('imputed_count', 0)
             })
 
+_TEAM_MEMBERS = [
+    {
+        "name": "Dr Jonathan Cools-Lartigue",
+        "role": "Chief Executive Officer",
+        "bio": "blurb",
+        "avatar": "👩‍⚕️"
+    },
+    {
+        "name": "Shayan Hajhashemi",
+        "role": "Chief Technology Officer",
+        "bio": "blurb",
+        "avatar": "👨‍💻"
+    },
+    {
+        "name": "Benjamin Gordon",
+        "role": "Chief Scientific Officer",
+        "bio": "blurb",
+        "avatar": "👨‍💼"
+    },
+    {
+        "name": "Dr Kim Ma",
+        "role": "Chief Medical Officer",
+        "bio": "blurb",
+        "avatar": "👩‍💼"
+    }
+]
+
+# Team cards are static, so render their HTML once at import
+_TEAM_CARDS = [
+    f"""
+            <div style='background-color: #f8f9fa; padding: 1.5rem; border-radius: 10px; margin-bottom: 1rem; text-align: center;'>
+                <div style='font-size: 4rem; margin-bottom: 1rem;'>{member['avatar']}</div>
+                <h4 style='color: #2E86AB; margin: 0.5rem 0;'>{member['name']}</h4>
+                <h5 style='color: #666; margin: 0.5rem 0;'>{member['role']}</h5>
+                <p style='color: #888; font-size: 0.9rem; line-height: 1.4;'>{member['bio']}</p>
+            </div>
+            """
+    for member in _TEAM_MEMBERS
+]
+
 def show_about_page():
     """About us page with team profiles"""
     st.title("👥 About Rizome")
@@ -813,44 +881,11 @@ def show_about_page():
     # Team Profiles (same as before)
     st.subheader("👨‍💼 Meet Our Team")
     
-    team_members = [
-        {
-            "name": "Dr Jonathan Cools-Lartigue",
-            "role": "Chief Executive Officer",
-            "bio": "blurb",
-            "avatar": "👩‍⚕️"
-        },
-        {
-            "name": "Shayan Hajhashemi",
-            "role": "Chief Technology Officer",
-            "bio": "blurb",
-            "avatar": "👨‍💻"
-        },
-        {
-            "name": "Benjamin Gordon",
-            "role": "Chief Scientific Officer",
-            "bio": "blurb",
-            "avatar": "👨‍💼"
-        },
-        {
-            "name": "Dr Kim Ma",
-            "role": "Chief Medical Officer",
-            "bio": "blurb",
-            "avatar": "👩‍💼"
-        }
-    ]
     
     cols = st.columns(2)
-    for i, member in enumerate(team_members):
+    for i, card_html in enumerate(_TEAM_CARDS):
         with cols[i % 2]:
-            st.markdown(f"""
-            <div style='background-color: #f8f9fa; padding: 1.5rem; border-radius: 10px; margin-bottom: 1rem; text-align: center;'>
-                <div style='font-size: 4rem; margin-bottom: 1rem;'>{member['avatar']}</div>
-                <h4 style='color: #2E86AB; margin: 0.5rem 0;'>{member['name']}</h4>
-                <h5 style='color: #666; margin: 0.5rem 0;'>{member['role']}</h5>
-                <p style='color: #888; font-size: 0.9rem; line-height: 1.4;'>{member['bio']}</p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(card_html, unsafe_allow_html=True)
 
 
 def show_settings_page():
@@ -904,10 +939,9 @@ def show_settings_page():
                     success, diagnostics = delete_user_account_and_data(user_id)
 
                 if success:
-                    st.success("Your account and data have been permanently removed.")
+                    # The notice is shown after the rerun (see account_deleted_notice)
                     logout()
                     st.session_state["account_deleted_notice"] = True
-                    time.sleep(1.5)
                     st.rerun()
                 else:
                     st.error("We removed some data, but parts of the deletion process reported issues.")
@@ -945,9 +979,9 @@ def show_password_update_page():
                     if new_password == confirm_password:
                         success, message = update_password(new_password)
                         if success:
-                            st.success(f"✅ {message}")
-                            st.info("💡 You can now sign in with your new password.")
-                            time.sleep(2)
+                            st.session_state.flash_message = (
+                                f"✅ {message}\n\n💡 You can now sign in with your new password."
+                            )
                             # Clear query params and redirect to landing
                             st.query_params.clear()
                             st.rerun()
@@ -958,12 +992,21 @@ def show_password_update_page():
                 else:
                     st.error("❌ Please fill in both password fields")
 
+def _show_flash_message():
+    """Show the notice queued by the previous run right before it called st.rerun()"""
+    message = st.session_state.pop('flash_message', None)
+    if message:
+        st.success(message)
+    if st.session_state.pop('flash_balloons', False):
+        st.balloons()
+
 def main():
     """Main application entry point"""
     
     # Initialize session state and authentication system
     init_session_state()
     init_auth()
+    _show_flash_message()
     
     # Check for password reset flow
     query_params = st.query_params
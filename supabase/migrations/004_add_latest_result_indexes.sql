@@ -0,0 +1,11 @@
+-- Composite indexes for the dashboard's "latest row per user" lookups
+-- (get_user_data: WHERE user_id = ? ORDER BY submitted_at/created_at DESC LIMIT 1)
+CREATE INDEX IF NOT EXISTS idx_questionnaires_user_submitted ON questionnaires(user_id, submitted_at DESC);
+CREATE INDEX IF NOT EXISTS idx_cbc_results_user_created ON cbc_results(user_id, created_at DESC);
+
+-- The composite indexes lead with user_id, so they also serve the plain
+-- user_id filters (including the RLS policies) the old indexes were for.
+-- DatabaseManager.create_tables builds and drops the same indexes, so running
+-- it afterwards does not bring the old ones back
+DROP INDEX IF EXISTS idx_questionnaires_user_id;
+DROP INDEX IF EXISTS idx_cbc_results_user_id;
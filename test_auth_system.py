@@ -60,10 +60,10 @@ def test_database_connection():
 
     if db.db_type == 'sqlite':
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = [row[0] for row in cursor.fetchall()]
+        tables = [row['name'] for row in cursor.fetchall()]
     else:
         cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='public'")
-        tables = [row[0] if isinstance(row, tuple) else row['table_name'] for row in cursor.fetchall()]
+        tables = [row['table_name'] for row in cursor.fetchall()]
 
     print(f"✓ Tables found: {tables}")
 
@@ -73,7 +73,7 @@ def test_database_connection():
 
     print(f"✓ All required tables present")
 
-    conn.close()
+    db.release_connection(conn)
 
     print("\n✅ Database connection tests PASSED")
     return True
@@ -99,7 +99,7 @@ def test_user_registration():
     except:
         pass
 
-    conn.close()
+    db.release_connection(conn)
 
     # Test registration
     username = "testuser"
@@ -126,14 +126,9 @@ def test_user_registration():
     )
     result = cursor.fetchone()
 
-    if isinstance(result, dict):
-        db_username = result['username']
-        db_email = result['email']
-        db_hash = result['password_hash']
-    else:
-        db_username = result[0]
-        db_email = result[1]
-        db_hash = result[2]
+    db_username = result['username']
+    db_email = result['email']
+    db_hash = result['password_hash']
 
     print(f"✓ User found in database")
     print(f"  Username: {db_username}")
@@ -145,7 +140,7 @@ def test_user_registration():
     assert db_email == email, "Email mismatch"
     assert isinstance(db_hash, str), "Password hash should be string"
 
-    conn.close()
+    db.release_connection(conn)
 
     print("\n✅ User registration tests PASSED")
     return username, password
@@ -35,12 +35,6 @@ def test_dashboard_data_accuracy():
         print("❌ No CBC results found in database")
         return False
     
-    # Convert to dict if needed
-    if not isinstance(result, dict):
-        columns = ['id', 'user_id', 'wbc', 'nlr', 'hgb', 'mcv', 'plt', 'rdw', 'mono_abs',
-                   'risk_score', 'risk_interpretation', 'created_at']
-        result = dict(zip(columns, result))
-    
     print(f"\n📊 Latest CBC Result (ID: {result['id']})")
     print(f"   Created: {result['created_at']}")
     print("\n1. CBC VALUES IN DATABASE:")
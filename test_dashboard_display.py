@@ -27,12 +27,6 @@ if not result:
     print("❌ Record not found")
     sys.exit(1)
 
-if not isinstance(result, dict):
-    columns = ['id', 'user_id', 'wbc', 'hgb', 'risk_score', 
-               'cancer_probability_pct', 'model_used', 'risk_level',
-               'risk_interpretation', 'created_at']
-    result = dict(zip(columns, result))
-
 # Parse risk_interpretation (this is what dashboard does)
 try:
     detailed_prediction = json.loads(result.get('risk_interpretation', '{}'))
@@ -25,10 +25,6 @@ if not result:
     print("❌ Record not found")
     sys.exit(1)
 
-if not isinstance(result, dict):
-    columns = ['id', 'wbc', 'hgb', 'mcv', 'plt', 'rdw', 'nlr', 'mono_abs', 'risk_interpretation']
-    result = dict(zip(columns, result))
-
 # Parse risk_interpretation
 try:
     detailed_prediction = json.loads(result.get('risk_interpretation', '{}'))
@@ -75,11 +75,6 @@ def test_model_used_saving():
     result = db.execute_query(query, fetch='one')
     
     if result:
-        if not isinstance(result, dict):
-            columns = ['id', 'risk_score', 'cancer_probability_pct', 'model_used', 
-                      'model_loaded', 'risk_level', 'created_at']
-            result = dict(zip(columns, result))
-        
         print("\n5. MOST RECENT DATABASE RECORD:")
         print(f"   ID: {result['id']}")
         print(f"   Risk Score: {result['risk_score']}")
@@ -1,6 +1,10 @@
-import psycopg2
-from dotenv import load_dotenv
+import sys
 import os
+from pathlib import Path
+from dotenv import load_dotenv
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.pg_pool import pooled_connection
 
 # Load environment variables from .env
 load_dotenv()
@@ -18,38 +22,34 @@ print(f"  Host: {HOST}")
 print(f"  Port: {PORT}")
 print(f"  Database: {DBNAME}")
 
-# Connect to the database
+# Connect to the database (pooled, so repeated checks reuse the connection)
 try:
-    connection = psycopg2.connect(
+    with pooled_connection(
         user=USER,
         password=PASSWORD,
         host=HOST,
         port=PORT,
         dbname=DBNAME
-    )
-    print("Connection successful!")
-    
-    # Create a cursor to execute SQL queries
-    cursor = connection.cursor()
-    
-    # Example query
-    cursor.execute("SELECT NOW();")
-    result = cursor.fetchone()
-    print("Current Time:", result)
-    
-    # Test our tables exist
-    cursor.execute("SELECT COUNT(*) FROM users")
-    user_count = cursor.fetchone()[0]
-    print(f"Users in database: {user_count}")
-    
-    cursor.execute("SELECT COUNT(*) FROM cbc_results")
-    cbc_count = cursor.fetchone()[0]
-    print(f"CBC results in database: {cbc_count}")
+    ) as connection:
+        print("Connection successful!")
+        
+        # Create a cursor to execute SQL queries
+        cursor = connection.cursor()
+        
+        # Server time and table counts in a single round-trip
+        cursor.execute("""
+            SELECT NOW(),
+                   (SELECT COUNT(*) FROM users),
+                   (SELECT COUNT(*) FROM cbc_results)
+        """)
+        current_time, user_count, cbc_count = cursor.fetchone()
+        print("Current Time:", current_time)
+        print(f"Users in database: {user_count}")
+        print(f"CBC results in database: {cbc_count}")
 
-    # Close the cursor and connection
-    cursor.close()
-    connection.close()
-    print("Connection closed.")
+        # Close the cursor and return the connection to the pool
+        cursor.close()
+    print("Connection returned to pool.")
     print("SUCCESS: Remote Supabase is working!")
 
 except Exception as e:
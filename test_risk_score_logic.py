@@ -61,11 +61,6 @@ print("TESTING RISK SCORE DISPLAY LOGIC")
 print("="*70)
 
 for result in results:
-    if not isinstance(result, dict):
-        columns = ['id', 'risk_score', 'cancer_probability_pct', 
-                   'cancer_probability', 'risk_interpretation', 'created_at']
-        result = dict(zip(columns, result))
-    
     print(f"\n📊 Record ID: {result['id']}")
     print(f"   Created: {result['created_at']}")
     print(f"\n   Database Values:")
@@ -47,10 +47,10 @@ def test_database_connection():
         print(f"Connection successful: {type(conn)}")
         
         # Test query
-        result = db.execute_query('SELECT COUNT(*) FROM users', fetch='one')
+        result = db.execute_query('SELECT COUNT(*) AS user_count FROM users', fetch='one')
         
         if db.db_type == 'postgresql':
-            user_count = result[0] if result else 0
+            user_count = result['user_count'] if result else 0
             print(f"Users in Supabase database: {user_count}")
             
             # Test inserting test data
@@ -79,7 +79,7 @@ def test_database_connection():
         else:
             print("Using SQLite fallback")
             
-        conn.close()
+        db.release_connection(conn)
         return True
         
     except Exception as e:
@@ -34,11 +34,6 @@ def test_update_existing_record():
         print(f"❌ Record {cbc_result_id} not found")
         return False
     
-    if not isinstance(record, dict):
-        columns = ['id', 'wbc', 'nlr', 'hgb', 'mcv', 'plt', 'rdw', 'mono_abs',
-                   'risk_score', 'cancer_probability_pct', 'model_used']
-        record = dict(zip(columns, record))
-    
     print(f"\n1. CURRENT RECORD (ID {cbc_result_id}):")
     print(f"   WBC: {record['wbc']}")
     print(f"   HGB: {record['hgb']}")
@@ -78,9 +73,6 @@ def test_update_existing_record():
     print(f"\n5. VERIFYING UPDATE...")
     updated_record = db.execute_query(query, (cbc_result_id,), fetch='one')
     
-    if not isinstance(updated_record, dict):
-        updated_record = dict(zip(columns, updated_record))
-    
     print(f"   Risk Score: {updated_record['risk_score']}")
     print(f"   Cancer Probability Pct: {updated_record['cancer_probability_pct']}")
     print(f"   Model Used: {updated_record['model_used']}")
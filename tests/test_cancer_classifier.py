@@ -58,4 +58,27 @@ def test_extract_features_handles_missing_values(sample_cbc_payload):
     assert features["WBC"] == pytest.approx(sample_cbc_payload["WBC"], rel=1e-6)
     assert features["_imputed_count"] == len(classifier.required_features) - 1
     assert "NLR" in features
-    assert "_missing_features" in features
\ No newline at end of file
+    assert "_missing_features" in features
+
+def test_predict_cancer_risk_batch_scores_rows_in_one_call(sample_cbc_payload):
+    class FakeModel:
+        calls = 0
+
+        def predict_proba(self, X):
+            FakeModel.calls += 1
+            return [[1 - wbc / 100, wbc / 100] for wbc in X["WBC"]]
+
+    classifier = cc.CancerClassifier()
+    classifier.model = FakeModel()
+    classifier.model_loaded = True
+
+    payloads = [sample_cbc_payload, {**sample_cbc_payload, "WBC": 30.0}, {**sample_cbc_payload, "HGB": 500.0}]
+    results = cc.predict_cancer_risk_batch(payloads, classifier)
+
+    assert FakeModel.calls == 1
+    assert [r.get("cancer_probability") for r in results[:2]] == [
+        pytest.approx(0.062), pytest.approx(0.30)
+    ]
+    assert results[1]["interpretation"]["level"]
+    assert "error" in results[2]
+    assert results[0] == cc.predict_cancer_risk(sample_cbc_payload, classifier)
@@ -0,0 +1,113 @@
+import sqlite3
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from utils import cancer_classifier as cc  # noqa: E402
+from utils import database as db_module  # noqa: E402
+
+FULL_PAYLOAD = {"WBC": 6.2, "NLR": 2.4, "HGB": 142.0, "MCV": 91.5, "PLT": 230.0, "RDW": 12.7, "MONO": 0.48}
+
+
+@pytest.fixture()
+def sqlite_db(monkeypatch, tmp_path):
+    """Fresh SQLite DatabaseManager in tmp_path, installed as the global manager"""
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.setattr(db_module, "st", SimpleNamespace(secrets={}, error=lambda *args: None))
+
+    def sqlite_connection(self):
+        conn = sqlite3.connect(str(tmp_path / "users.db"))
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    monkeypatch.setattr(db_module.DatabaseManager, "_get_sqlite_connection", sqlite_connection)
+    manager = db_module.DatabaseManager()
+    assert manager.db_type == "sqlite"
+    monkeypatch.setattr(db_module, "_db_manager", manager)
+
+    manager.create_tables()
+    # The local schema predates the ML prediction columns the migrations add
+    present = set(manager.get_table_columns("cbc_results"))
+    for column, _ in db_module._prediction_column_values(manager, _prediction(FULL_PAYLOAD)):
+        if column not in present:
+            manager.execute_query(f"ALTER TABLE cbc_results ADD COLUMN {column}")
+    manager._table_columns_cache.clear()
+
+    manager.execute_query(
+        "INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)",
+        ("tester", "hash", "tester@example.com"),
+    )
+    return manager
+
+
+def _prediction(cbc_data: dict) -> dict:
+    classifier = cc.CancerClassifier()
+    classifier.model_loaded = False
+    return classifier.predict(cbc_data)
+
+
+def _stored_row(db, cbc_result_id: int) -> dict:
+    return db.execute_query("SELECT * FROM cbc_results WHERE id = ?", (cbc_result_id,), fetch="one")
+
+
+def _assert_record_matches_row(record: dict, row: dict):
+    # created_at is set locally; filename comes from upload metadata, which the
+    # local schema has no column for
+    mismatches = {
+        key: (value, row.get(key))
+        for key, value in record.items()
+        if key not in ("created_at", "filename") and row.get(key) != value
+    }
+    assert mismatches == {}
+
+
+def test_batch_update_and_rebuilt_record_match_stored_rows(sqlite_db):
+    payloads = [
+        FULL_PAYLOAD,
+        {"WBC": 11.8, "HGB": 101.0, "PLT": 480.0},
+    ]
+    cbc_result_ids = [
+        db_module.save_cbc_data(1, None, payload, None, "manual_entry") for payload in payloads
+    ]
+    assert all(cbc_result_ids)
+
+    cbc_values = [db_module.get_cbc_data_for_prediction(cbc_id) for cbc_id in cbc_result_ids]
+    predictions = [_prediction(values) for values in cbc_values]
+    # Error results carry no model_features, so they need their own UPDATE layout
+    error_result = cc.CancerClassifier()._failed_result(RuntimeError("boom"), ["RDW"], 1)
+    predictions[1] = error_result
+
+    updated = db_module.update_cbc_predictions_batch(list(zip(cbc_result_ids, predictions)))
+    assert updated == len(cbc_result_ids)
+
+    for cbc_id, values, prediction in zip(cbc_result_ids, cbc_values, predictions):
+        record = db_module.build_cbc_result_record(cbc_id, values, prediction, {"filename": "manual-entry"})
+        _assert_record_matches_row(record, _stored_row(sqlite_db, cbc_id))
+
+    assert _stored_row(sqlite_db, cbc_result_ids[1])["model_used"] == "Simulation (error)"
+    assert _stored_row(sqlite_db, cbc_result_ids[1])["cbc_vector"] is None
+    assert _stored_row(sqlite_db, cbc_result_ids[0])["cbc_vector"] is not None
+
+
+def test_batch_update_does_not_count_missing_ids(sqlite_db):
+    cbc_result_id = db_module.save_cbc_data(1, None, FULL_PAYLOAD, None, "manual_entry")
+    prediction = _prediction(FULL_PAYLOAD)
+
+    updated = db_module.update_cbc_predictions_batch([(cbc_result_id, prediction), (cbc_result_id + 1000, prediction)])
+
+    assert updated == 1
+    assert _stored_row(sqlite_db, cbc_result_id)["model_used"] == prediction["model_used"]
+
+
+def test_execute_query_iter_yields_plain_dicts(sqlite_db):
+    rows = list(sqlite_db.execute_query_iter("SELECT id, username FROM users", chunk_size=1))
+
+    assert rows == [{"id": 1, "username": "tester"}]
+    assert type(rows[0]) is dict
@@ -0,0 +1,128 @@
+import sqlite3
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import psycopg2
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from utils import database as db_module  # noqa: E402
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, query, params=None):
+        if not self.conn.alive:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.queries.append(query)
+
+    def fetchone(self):
+        return {"x": 1}
+
+    def fetchall(self):
+        return [{"column_name": "id", "data_type": "integer"}]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = 0
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class FakePool:
+    """Hands out queued connections; an Exception in the queue is raised by getconn"""
+
+    def __init__(self, *checkouts):
+        self.checkouts = list(checkouts)
+        self.returned = []
+
+    def getconn(self):
+        item = self.checkouts.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def putconn(self, conn, close=False):
+        self.returned.append((conn, close))
+
+
+@pytest.fixture()
+def postgres_manager(monkeypatch, tmp_path):
+    """DatabaseManager configured for PostgreSQL, with SQLite fallback in tmp_path"""
+    monkeypatch.setenv("DATABASE_URL", "postgresql://user:pw@localhost:5432/db")
+    monkeypatch.setattr(db_module, "st", SimpleNamespace(secrets={}, error=lambda *args: None))
+
+    def sqlite_connection(self):
+        conn = sqlite3.connect(str(tmp_path / "users.db"))
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    monkeypatch.setattr(db_module.DatabaseManager, "_get_sqlite_connection", sqlite_connection)
+    manager = db_module.DatabaseManager()
+    assert manager.db_type == "postgresql"
+    return manager
+
+
+def test_pool_failure_falls_back_to_sqlite(monkeypatch, postgres_manager):
+    pooled = FakeConnection()
+    pool = FakePool(pooled, RuntimeError("could not connect to server"))
+    monkeypatch.setattr(db_module, "get_pool", lambda *args, **kwargs: pool)
+
+    assert postgres_manager.execute_query("SELECT 1 AS x", fetch="one") == {"x": 1}
+    assert pool.returned == [(pooled, False)]
+
+    # The pool now exists; a failed checkout must not hand the SQLite connection to it
+    assert postgres_manager.execute_query("SELECT 1 AS x", fetch="one") == {"x": 1}
+    assert postgres_manager.db_type == "sqlite"
+    assert postgres_manager._pg_pool is None
+    assert pool.returned == [(pooled, False)]
+
+
+def test_connection_dropped_while_idle_is_discarded(monkeypatch, postgres_manager):
+    stale = FakeConnection(alive=False)
+    fresh = FakeConnection()
+    pool = FakePool(stale, fresh)
+    monkeypatch.setattr(db_module, "get_pool", lambda *args, **kwargs: pool)
+
+    assert postgres_manager.execute_query("SELECT 1 AS x", fetch="one") == {"x": 1}
+    assert pool.returned == [(stale, True), (fresh, False)]
+    assert fresh.queries == ["SELECT 1", "SELECT 1 AS x"]
+
+
+def test_full_table_column_types_is_one_catalog_query(monkeypatch, postgres_manager):
+    conn = FakeConnection()
+    pool = FakePool(conn)
+    monkeypatch.setattr(db_module, "get_pool", lambda *args, **kwargs: pool)
+
+    assert postgres_manager.get_column_types("cbc_results") == {"id": "integer"}
+    assert conn.queries == ["SELECT 1", db_module.TABLE_COLUMN_TYPES_QUERY]
+    # The listing also fills the column-name cache, so this needs no checkout
+    assert postgres_manager.get_table_columns("cbc_results") == ["id"]
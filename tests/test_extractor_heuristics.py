@@ -0,0 +1,144 @@
+"""Synthetic-text checks for the CBC line heuristics (no PDF fixtures needed)"""
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from quebec_health_booklet_extractor import QuebecHealthBookletExtractor  # noqa: E402
+from universal_carnetsante_extractor import UniversalCarnetSanteExtractor  # noqa: E402
+from utils.pdf_extraction import LabValueMapping  # noqa: E402
+
+FILLER = "Texte du rapport"
+
+# Booklet blocks keyed by the line index of their anchor. The extractor gates on
+# those indices: Hémoglobine only before line 60, "Obser vation" is MCV between
+# 60 and 90 and RDW above 70 (MCV wins the overlap). Later hits override earlier
+# ones, but only when their window actually holds a value.
+BOOKLET_BLOCKS: Dict[int, List[str]] = {
+    5: ["Leucocytes", "4,5 -  11 (10*9/L)5,10  10*9/L"],
+    10: ["Hémoglobine", "135 -  175  (g/L)130  g/L"],
+    20: ["Leucocytes", "4,5 -  11 (10*9/L)5,87  10*9/L"],
+    25: ["Hémoglobine", "135 -  175  (g/L)137  g/L"],
+    30: ["Plaquettes", "140 -  450 (10*9/L)250  10*9/L"],
+    # Duplicate anchor whose window has no value: the earlier PLT stands
+    34: ["Plaquettes", "Valeur de référence 140 - 450", "résultat à suivre"],
+    40: ["Monocytes", "0 -  0,8 (10*9/L)0,45  10*9/L"],
+    44: ["NEUTROPHILES %", "40 -  70 (%)63,3  %"],
+    48: ["LYMPHOCY TES %", "22 -  44 (%)25,1  %"],
+    52: ["MONOCYTES %", "2 -  10 (%)7,2  %"],
+    # Below the MCV window
+    55: ["Obser vation", "80 -  100 (fL)70  fL"],
+    # Second Hémoglobine block (past line 60) is not HGB
+    62: ["Hémoglobine", "135 -  175  (g/L)99  g/L"],
+    66: ["Obser vation", "80 -  100 (fL)88,5  fL"],
+    75: ["Obser vation", "80 -  100 (fL)91,2  fL"],
+    95: ["Obser vation", "Valeur de référence 12,7 - 16", "14,2"],
+    # Out-of-range trailing number: the earlier RDW stands
+    100: ["Obser vation", "résultat 25"],
+}
+
+BOOKLET_EXPECTED = {
+    "WBC": 5.87,
+    "HGB": 137.0,
+    "PLT": 250.0,
+    "MONO": 0.45,
+    "NEUT_PCT": 63.3,
+    "LYMPH_PCT": 25.1,
+    "MCV": 91.2,
+    "RDW": 14.2,
+}
+
+
+def _booklet_text(blocks: Dict[int, List[str]], length: int = 110) -> str:
+    lines = [FILLER] * length
+    for index, block in blocks.items():
+        lines[index:index + len(block)] = block
+    return "\n".join(lines)
+
+
+def _values(cbc_data: Dict) -> Dict[str, float]:
+    return {key: entry["value"] for key, entry in cbc_data.items()}
+
+
+def test_booklet_heuristics_gates_and_duplicates():
+    cbc_data = QuebecHealthBookletExtractor()._extract_cbc_values(_booklet_text(BOOKLET_BLOCKS))
+
+    assert list(cbc_data) == list(BOOKLET_EXPECTED)
+    assert _values(cbc_data) == pytest.approx(BOOKLET_EXPECTED)
+
+
+def test_booklet_heuristics_without_late_sections():
+    # Everything past line 60 removed: no MCV/RDW, HGB from the last early block
+    early_blocks = {index: block for index, block in BOOKLET_BLOCKS.items() if index < 60}
+    cbc_data = QuebecHealthBookletExtractor()._extract_cbc_values(_booklet_text(early_blocks))
+
+    expected = {key: value for key, value in BOOKLET_EXPECTED.items() if key not in ("MCV", "RDW")}
+    assert _values(cbc_data) == pytest.approx(expected)
+
+
+def _traditional_text(header: str, end_marker: Optional[str]) -> str:
+    lines = [
+        "PATIENT EXTERNE DOE, JOHN",
+        # Before the hematology header: never parsed
+        "GB WBC 9.99 10^9/L 4.50-11.00 RADVS",
+        header,
+        "FSC / CBC",
+        "ANALYSE(S) RÉSULTAT",
+        "GB WBC 5.87 10^9/L 4.50-11.00 RADVS",
+        "HB HGB 137 g/L 135-175 RADVS",
+        "Neutrophiles abs. Auto 3.72 10^9/L 1.80-7.70 RADVS",
+        "Neutrophiles Rel. 63.31 % 40.00-70.00 RADVS",
+    ]
+    if end_marker:
+        lines.append(end_marker)
+    lines.append("PLAQ PLT 250 10^9/L 140-450 RADVS")
+    return "\n".join(lines)
+
+
+TRADITIONAL_EXPECTED = {"WBC": 5.87, "HGB": 137.0, "NEUT_ABS": 3.72, "NEUT_PCT": 63.31}
+
+
+@pytest.mark.parametrize("header", ["H E M A T O L O G I E", "H E M A T O L O G Y"])
+@pytest.mark.parametrize("end_marker", ["B I O C H I M I E", "suite à la page suivante"])
+def test_traditional_section_stops_at_end_marker(header, end_marker):
+    text = _traditional_text(header, end_marker)
+    cbc_data = UniversalCarnetSanteExtractor().extract_cbc_traditional(text)
+
+    assert _values(cbc_data) == pytest.approx(TRADITIONAL_EXPECTED)
+
+
+def test_traditional_section_without_end_marker_runs_to_end():
+    text = _traditional_text("H E M A T O L O G I E", None)
+    cbc_data = UniversalCarnetSanteExtractor().extract_cbc_traditional(text)
+
+    assert _values(cbc_data) == pytest.approx({**TRADITIONAL_EXPECTED, "PLT": 250.0})
+
+
+def test_traditional_section_without_header_finds_nothing():
+    text = _traditional_text("", "B I O C H I M I E")
+    assert UniversalCarnetSanteExtractor().extract_cbc_traditional(text) == {}
+
+
+@pytest.mark.parametrize(
+    "test_name, expected",
+    [
+        ("GB", "WBC"),
+        ("White Blood Cell Count", "WBC"),
+        ("Neutrophil %", "NEUT_PCT"),
+        # Several patterns match: the first one listed wins, not the leftmost hit
+        ("Lymphocyte rel abs", "LYMPH_ABS"),
+        ("Platelet hemoglobin", "HGB"),
+        # '.*' inside a pattern does not cross a line break
+        ("White\nblood cell", None),
+        ("Monocyte\nabs platelet", "PLT"),
+        ("Ferritin", None),
+    ],
+)
+def test_normalize_test_name_pattern_precedence(test_name, expected):
+    assert LabValueMapping().normalize_test_name(test_name) == expected
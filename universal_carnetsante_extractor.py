@@ -4,14 +4,74 @@ Universal CarnetSante Extractor
 Handles both traditional lab reports and Quebec Health Booklet formats
 """
 
+import io
+import os
 import re
+import sys
 import unicodedata
-import PyPDF2
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import json
 
+from utils.pdf_cache import cached_extract_pdf_text
+
+# Patient info (traditional lab format)
+_TRAD_NAME_RE = re.compile(r'PATIENT EXTERNE\s+([A-Z]+,\s*[A-Z]+)')
+_TRAD_DOB_RE = re.compile(r'Né\(e\)/DOB:\s*(\d{4}/\d{2}/\d{2})')
+_TRAD_AGE_RE = re.compile(r'Age:\s*(\d+)')
+_TRAD_SEX_RE = re.compile(r'Sex\(e\):\s*([MF])')
+_TRAD_COLLECTED_RE = re.compile(r'PRÉLEVÉ/COLLECTED\s*(\d{4}/\d{2}/\d{2}\s*\d{2}:\d{2})')
+
+# Patient info (Quebec Health Booklet format)
+_BOOKLET_NAME_RE = re.compile(r'Carnet santé\s+([A-Z]+)')
+_BOOKLET_DATE_RE = re.compile(r'(\d{1,2}\s+\w+\s+\d{4},\s*\d{1,2}\s*h\s*\d{2})')
+
+# Booklet value lines: reference_range(unit)value unit
+# Examples: "4,5 -  11 (10*9/L)5,87  10*9/L", "135 -  175  (g/L)137  g/L"
+_BOOKLET_VALUE_RES = {
+    '10*9/L': re.compile(r'[0-9,\.\s\-\(\)]+10\*9/L\)([0-9,\.]+)\s*10\*9/L'),
+    'g/L': re.compile(r'[0-9,\.\s\-\(\)]+g/L\)([0-9,\.]+)\s*g/L'),
+    '%': re.compile(r'[0-9,\.\s\-\(\)]+%\)([0-9,\.]+)\s*%'),
+    'fL': re.compile(r'[0-9,\.\s\-\(\)]+fL\)([0-9,\.]+)\s*fL'),
+}
+_BOOKLET_ANY_VALUE_RE = re.compile(r'([0-9,\.]+)')
+_TRAILING_NUMBER_RE = re.compile(r'([0-9,\.]+)\s*$')
+_BOOKLET_TEST_NAME_RE = re.compile(r'^[A-ZÀ-ÿ][a-zà-ÿ\s%]+$')
+_BOOKLET_FLAGGED_VALUE_RE = re.compile(r'([0-9,\.]+)\s*([A-Za-z\*\^0-9\/\%]+)?\s*(Bas|Élevé|Low|High)?')
+_BOOKLET_REFERENCE_RE = re.compile(r'Valeur de référence\s*([0-9,\.\s\-\(\)A-Za-z\*\^\/\%]+)')
+# Booklet lines for known tests: (pattern, (test name, unit))
+_BOOKLET_TEST_RES = [
+    (re.compile(r'Leucocytes.*?([0-9,\.]+)\s*10\*9/L'), ('Leucocytes', '10*9/L')),
+    (re.compile(r'Hémoglobine.*?([0-9,\.]+)\s*g/L'), ('Hémoglobine', 'g/L')),
+    (re.compile(r'Hématocrite.*?([0-9,\.]+)(?:\s*Bas)?'), ('Hématocrite', '')),
+    (re.compile(r'Érythrocytes.*?([0-9,\.]+)\s*10\*12/L'), ('Érythrocytes', '10*12/L')),
+    (re.compile(r'Plaquettes.*?([0-9,\.]+)\s*10\*9/L'), ('Plaquettes', '10*9/L')),
+    (re.compile(r'Neutrophiles.*?([0-9,\.]+)\s*10\*9/L'), ('Neutrophiles', '10*9/L')),
+    (re.compile(r'NEUTROPHILES %.*?([0-9,\.]+)\s*%'), ('NEUTROPHILES %', '%')),
+    (re.compile(r'Lymphocytes.*?([0-9,\.]+)\s*10\*9/L'), ('Lymphocytes', '10*9/L')),
+    (re.compile(r'LYMPHOCYTES %.*?([0-9,\.]+)\s*%'), ('LYMPHOCYTES %', '%')),
+    (re.compile(r'Monocytes.*?([0-9,\.]+)\s*10\*9/L'), ('Monocytes', '10*9/L')),
+    (re.compile(r'MONOCYTES %.*?([0-9,\.]+)\s*%'), ('MONOCYTES %', '%')),
+    (re.compile(r'Éosinophiles.*?([0-9,\.]+)\s*10\*9/L'), ('Éosinophiles', '10*9/L')),
+    (re.compile(r'EOSINPHILE %.*?([0-9,\.]+)\s*%'), ('EOSINPHILE %', '%')),
+    (re.compile(r'Basophiles.*?([0-9,\.]+)\s*10\*9/L'), ('Basophiles', '10*9/L')),
+    (re.compile(r'BASOPHILES %.*?([0-9,\.]+)\s*%'), ('BASOPHILES %', '%')),
+]
+
+# Traditional lab report section markers
+_HEMATOLOGY_HEADERS = ('H E M A T O L O G I E', 'H E M A T O L O G Y')
+_HEMATOLOGY_END_MARKERS = ('B I O C H I M I E', 'suite à la page suivante')
+
+# Traditional lab lines
+# "GB WBC 5.87 10^9/L 4.50-11.00 RADVS"
+_TRAD_BASIC_RE = re.compile(r'^([A-Z]+)\s+([A-Z]+)\s+([0-9\.]+)\s*([LH]?)\s*([a-zA-Z0-9\^\\/]*)\s+([0-9\.\-]+)')
+# "Neutrophiles abs. Auto 3.72 10^9/L 1.80-7.70 RADVS"
+_TRAD_ABS_RE = re.compile(r'^([A-Za-z]+)\s+abs\.\s+Auto\s+([0-9\.]+)\s*([LH]?)\s*([a-zA-Z0-9\^\\/]*)\s+([0-9\.\-]+)')
+# "Neutrophiles Rel. 63.31 % 40.00-70.00 RADVS"
+_TRAD_REL_RE = re.compile(r'^([A-Za-z]+)\s+Rel\.\s+([0-9\.]+)\s*([LH]?)\s*%\s+([0-9\.\-]+)')
+
 class UniversalCarnetSanteExtractor:
     """Universal extractor for all CarnetSante formats"""
     
@@ -114,26 +174,26 @@ class UniversalCarnetSanteExtractor:
         patient_info = {}
         
         # Patient name
-        name_match = re.search(r'PATIENT EXTERNE\s+([A-Z]+,\s*[A-Z]+)', text)
+        name_match = _TRAD_NAME_RE.search(text)
         if name_match:
             patient_info['name'] = name_match.group(1)
         
         # Date of birth and age
-        dob_match = re.search(r'Né\(e\)/DOB:\s*(\d{4}/\d{2}/\d{2})', text)
+        dob_match = _TRAD_DOB_RE.search(text)
         if dob_match:
             patient_info['dob'] = dob_match.group(1)
         
-        age_match = re.search(r'Age:\s*(\d+)', text)
+        age_match = _TRAD_AGE_RE.search(text)
         if age_match:
             patient_info['age'] = int(age_match.group(1))
         
         # Sex
-        sex_match = re.search(r'Sex\(e\):\s*([MF])', text)
+        sex_match = _TRAD_SEX_RE.search(text)
         if sex_match:
             patient_info['sex'] = sex_match.group(1)
         
         # Collection date
-        collected_match = re.search(r'PRÉLEVÉ/COLLECTED\s*(\d{4}/\d{2}/\d{2}\s*\d{2}:\d{2})', text)
+        collected_match = _TRAD_COLLECTED_RE.search(text)
         if collected_match:
             patient_info['collection_date'] = collected_match.group(1)
         
@@ -144,21 +204,39 @@ class UniversalCarnetSanteExtractor:
         patient_info = {}
         
         # Patient name
-        name_match = re.search(r'Carnet santé\s+([A-Z]+)', text)
+        name_match = _BOOKLET_NAME_RE.search(text)
         if name_match:
             patient_info['name'] = name_match.group(1)
         
         # Collection date
-        date_match = re.search(r'(\d{1,2}\s+\w+\s+\d{4},\s*\d{1,2}\s*h\s*\d{2})', text)
+        date_match = _BOOKLET_DATE_RE.search(text)
         if date_match:
             patient_info['collection_date'] = date_match.group(1)
         
         return patient_info
     
+    def _hematology_section_lines(self, text: str) -> list:
+        """Lines from the first hematology header through the first end-of-section line"""
+        starts = [pos for pos in (text.find(header) for header in _HEMATOLOGY_HEADERS) if pos != -1]
+        if not starts:
+            return []
+        
+        # Widen to whole lines so the per-line checks below see the same text
+        start = text.rfind('\n', 0, min(starts)) + 1
+        header_end = text.find('\n', start)
+        if header_end == -1:
+            return [text[start:]]
+        
+        ends = [pos for pos in (text.find(marker, header_end) for marker in _HEMATOLOGY_END_MARKERS) if pos != -1]
+        end = text.find('\n', min(ends)) if ends else -1
+        
+        return (text[start:end] if end != -1 else text[start:]).split('\n')
+    
     def extract_cbc_traditional(self, text: str) -> Dict:
         """Extract CBC from traditional lab format"""
         cbc_data = {}
-        lines = text.split('\n')
+        # Only the hematology section can hold CBC values; skip the rest of the report
+        lines = self._hematology_section_lines(text)
         
         in_hematology = False
         found_fsc_cbc = False
@@ -180,8 +258,9 @@ class UniversalCarnetSanteExtractor:
             if not in_hematology or not found_fsc_cbc:
                 continue
             
-            # Skip header lines
-            if any(x in line for x in ['ANALYSE(S)', 'TEST(S)', 'RÉSULTAT', 'RESULT']):
+            # Skip header lines (a plain 'in' chain is several times faster
+            # than any() over a generator or a compiled alternation here)
+            if 'ANALYSE(S)' in line or 'TEST(S)' in line or 'RÉSULTAT' in line or 'RESULT' in line:
                 continue
             
             # Parse different line formats
@@ -292,7 +371,7 @@ class UniversalCarnetSanteExtractor:
                 # Look for pattern with no unit (just number)
                 for j in range(i, min(i + 4, len(lines))):
                     check_line = lines[j].strip()
-                    rdw_match = re.search(r'([0-9,\.]+)\s*$', check_line)
+                    rdw_match = _TRAILING_NUMBER_RE.search(check_line)
                     if rdw_match and 'Valeur de référence' not in check_line:
                         try:
                             value_str = rdw_match.group(1).replace(',', '.')
@@ -306,13 +385,15 @@ class UniversalCarnetSanteExtractor:
                                     'original_name': 'Largeur de distribution érythrocytaire'
                                 }
                                 break
-                        except:
+                        except ValueError:
                             continue
         
         return cbc_data
     
     def _extract_quebec_value(self, lines: list, start_idx: int, expected_unit: str) -> Optional[float]:
         """Extract value from Quebec Health Booklet format pattern: reference_range(unit)value unit"""
+        value_re = _BOOKLET_VALUE_RES.get(expected_unit, _BOOKLET_ANY_VALUE_RE)
+
         # Look in the next 4 lines for the pattern
         for i in range(start_idx, min(start_idx + 4, len(lines))):
             line = lines[i].strip()
@@ -322,42 +403,27 @@ class UniversalCarnetSanteExtractor:
                 continue
             
             # Look for the pattern: reference_range(unit)value unit
-            # Examples: "4,5 -  11 (10*9/L)5,87  10*9/L", "135 -  175  (g/L)137  g/L"
-            if expected_unit == '10*9/L':
-                # Pattern: reference_range(10*9/L)value 10*9/L
-                match = re.search(r'[0-9,\.\s\-\(\)]+10\*9/L\)([0-9,\.]+)\s*10\*9/L', line)
-            elif expected_unit == 'g/L':
-                # Pattern: reference_range(g/L)value g/L
-                match = re.search(r'[0-9,\.\s\-\(\)]+g/L\)([0-9,\.]+)\s*g/L', line)
-            elif expected_unit == '%':
-                # Pattern: reference_range(%)value %
-                match = re.search(r'[0-9,\.\s\-\(\)]+%\)([0-9,\.]+)\s*%', line)
-            elif expected_unit == 'fL':
-                # Pattern: reference_range(fL)value fL
-                match = re.search(r'[0-9,\.\s\-\(\)]+fL\)([0-9,\.]+)\s*fL', line)
-            else:
-                # General pattern
-                match = re.search(r'([0-9,\.]+)', line)
+            match = value_re.search(line)
             
             if match:
                 try:
                     value_str = match.group(1).replace(',', '.')
                     return float(value_str)
-                except:
+                except ValueError:
                     continue
         
         return None
     
     def _parse_traditional_line(self, line: str) -> Optional[tuple]:
         """Parse traditional lab format line"""
-        # Pattern 1: Basic CBC values like "GB WBC 5.87 10^9/L 4.50-11.00 RADVS"
-        match1 = re.search(r'^([A-Z]+)\s+([A-Z]+)\s+([0-9\.]+)\s*([LH]?)\s*([a-zA-Z0-9\^\\/]*)\s+([0-9\.\-]+)', line)
+        # Pattern 1: Basic CBC values
+        match1 = _TRAD_BASIC_RE.search(line)
         
-        # Pattern 2: Differential counts like "Neutrophiles abs. Auto 3.72 10^9/L 1.80-7.70 RADVS"
-        match2 = re.search(r'^([A-Za-z]+)\s+abs\.\s+Auto\s+([0-9\.]+)\s*([LH]?)\s*([a-zA-Z0-9\^\\/]*)\s+([0-9\.\-]+)', line)
+        # Pattern 2: Differential counts
+        match2 = _TRAD_ABS_RE.search(line)
         
-        # Pattern 3: Relative percentages like "Neutrophiles Rel. 63.31 % 40.00-70.00 RADVS"
-        match3 = re.search(r'^([A-Za-z]+)\s+Rel\.\s+([0-9\.]+)\s*([LH]?)\s*%\s+([0-9\.\-]+)', line)
+        # Pattern 3: Relative percentages
+        match3 = _TRAD_REL_RE.search(line)
         
         if match1:
             groups = match1.groups()
@@ -381,12 +447,12 @@ class UniversalCarnetSanteExtractor:
         # "5,87 10*9/L" and "Valeur de référence 4,5 - 11 (10*9/L)"
         
         # Pattern 1: Test name only (look for next lines for value)
-        if re.match(r'^[A-ZÀ-ÿ][a-zà-ÿ\s%]+$', line) and 'Valeur de référence' not in line:
+        if _BOOKLET_TEST_NAME_RE.match(line) and 'Valeur de référence' not in line:
             # This might be a test name, but we need the value from subsequent lines
             pass
         
         # Pattern 2: Value with unit and flag
-        value_match = re.search(r'([0-9,\.]+)\s*([A-Za-z\*\^0-9\/\%]+)?\s*(Bas|Élevé|Low|High)?', line)
+        value_match = _BOOKLET_FLAGGED_VALUE_RE.search(line)
         if value_match and 'Valeur de référence' not in line:
             try:
                 value_str = value_match.group(1).replace(',', '.')
@@ -397,43 +463,25 @@ class UniversalCarnetSanteExtractor:
                 # Find the test name from context (this is simplified)
                 # In a real implementation, you'd track the current test context
                 return (None, value, unit, flag, '')
-            except:
+            except ValueError:
                 pass
         
         # Pattern 3: Reference range
-        ref_match = re.search(r'Valeur de référence\s*([0-9,\.\s\-\(\)A-Za-z\*\^\/\%]+)', line)
+        ref_match = _BOOKLET_REFERENCE_RE.search(line)
         if ref_match:
             ref_range = ref_match.group(1)
             return (None, None, None, None, ref_range)
         
         # Specific patterns for known tests
-        test_patterns = {
-            r'Leucocytes.*?([0-9,\.]+)\s*10\*9/L': ('Leucocytes', '10*9/L'),
-            r'Hémoglobine.*?([0-9,\.]+)\s*g/L': ('Hémoglobine', 'g/L'),
-            r'Hématocrite.*?([0-9,\.]+)(?:\s*Bas)?': ('Hématocrite', ''),
-            r'Érythrocytes.*?([0-9,\.]+)\s*10\*12/L': ('Érythrocytes', '10*12/L'),
-            r'Plaquettes.*?([0-9,\.]+)\s*10\*9/L': ('Plaquettes', '10*9/L'),
-            r'Neutrophiles.*?([0-9,\.]+)\s*10\*9/L': ('Neutrophiles', '10*9/L'),
-            r'NEUTROPHILES %.*?([0-9,\.]+)\s*%': ('NEUTROPHILES %', '%'),
-            r'Lymphocytes.*?([0-9,\.]+)\s*10\*9/L': ('Lymphocytes', '10*9/L'),
-            r'LYMPHOCYTES %.*?([0-9,\.]+)\s*%': ('LYMPHOCYTES %', '%'),
-            r'Monocytes.*?([0-9,\.]+)\s*10\*9/L': ('Monocytes', '10*9/L'),
-            r'MONOCYTES %.*?([0-9,\.]+)\s*%': ('MONOCYTES %', '%'),
-            r'Éosinophiles.*?([0-9,\.]+)\s*10\*9/L': ('Éosinophiles', '10*9/L'),
-            r'EOSINPHILE %.*?([0-9,\.]+)\s*%': ('EOSINPHILE %', '%'),
-            r'Basophiles.*?([0-9,\.]+)\s*10\*9/L': ('Basophiles', '10*9/L'),
-            r'BASOPHILES %.*?([0-9,\.]+)\s*%': ('BASOPHILES %', '%'),
-        }
-        
-        for pattern, (test_name, unit) in test_patterns.items():
-            match = re.search(pattern, line)
+        for pattern, (test_name, unit) in _BOOKLET_TEST_RES:
+            match = pattern.search(line)
             if match:
                 try:
                     value_str = match.group(1).replace(',', '.')
                     value = float(value_str)
                     flag = 'H' if 'Élevé' in line else 'L' if 'Bas' in line else ''
                     return (test_name, value, unit, flag, '')
-                except:
+                except ValueError:
                     continue
         
         return None
@@ -450,11 +498,7 @@ class UniversalCarnetSanteExtractor:
     def extract_from_pdf(self, file_path: str) -> Dict:
         """Main extraction method"""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            text = cached_extract_pdf_text(file_path)
             
             format_type = self.detect_format(text)
 
@@ -518,6 +562,22 @@ class UniversalCarnetSanteExtractor:
                 }
             }
 
+def _extract_one(file_path: str) -> tuple:
+    """Extract a single PDF (process pool worker)"""
+    return file_path, UniversalCarnetSanteExtractor().extract_from_pdf(file_path)
+
+def extract_from_files(file_paths: List[str], max_workers: Optional[int] = None) -> Dict:
+    """Extract several PDFs in parallel, keyed by the given path in input order"""
+    if not file_paths:
+        return {}
+    
+    workers = max_workers or min(len(file_paths), os.cpu_count() or 1)
+    if workers == 1:
+        return dict(_extract_one(path) for path in file_paths)
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(_extract_one, file_paths))
+
 def test_universal_extractor():
     """Test the universal extractor on all CarnetSante files"""
     
@@ -527,33 +587,34 @@ def test_universal_extractor():
         "/Users/shayanhajhashemi/Documents/Rhizome/assets/carnetsante/shayan_carnetsante_type2.pdf"
     ]
     
-    extractor = UniversalCarnetSanteExtractor()
+    results = extract_from_files(files)
     
-    for file_path in files:
-        print(f"\n{'='*80}")
-        print(f"TESTING: {Path(file_path).name}")
-        print(f"{'='*80}")
-        
-        result = extractor.extract_from_pdf(file_path)
+    for file_path, result in results.items():
+        # Buffer each report and write it once so output stays cheap and unbroken
+        buf = io.StringIO()
+        print(f"\n{'='*80}", file=buf)
+        print(f"TESTING: {Path(file_path).name}", file=buf)
+        print(f"{'='*80}", file=buf)
         
-        print(f"Format: {result['extraction_metadata']['format']}")
-        print(f"Success: {result['extraction_metadata']['success']}")
-        print(f"CBC Tests Found: {result['extraction_metadata']['cbc_tests_found']}")
+        print(f"Format: {result['extraction_metadata']['format']}", file=buf)
+        print(f"Success: {result['extraction_metadata']['success']}", file=buf)
+        print(f"CBC Tests Found: {result['extraction_metadata']['cbc_tests_found']}", file=buf)
         
         if result.get('error'):
-            print(f"ERROR: {result['error']}")
-            continue
-        
-        if result['patient_info']:
-            print(f"\nPatient Info:")
-            for key, value in result['patient_info'].items():
-                print(f"  {key}: {value}")
+            print(f"ERROR: {result['error']}", file=buf)
+        else:
+            if result['patient_info']:
+                print(f"\nPatient Info:", file=buf)
+                for key, value in result['patient_info'].items():
+                    print(f"  {key}: {value}", file=buf)
+            
+            if result['cbc_data']:
+                print(f"\nCBC Data:", file=buf)
+                for test, data in result['cbc_data'].items():
+                    flag_str = f" [{data['flag']}]" if data['flag'] else ""
+                    print(f"  {test}: {data['value']} {data['unit']}{flag_str}", file=buf)
         
-        if result['cbc_data']:
-            print(f"\nCBC Data:")
-            for test, data in result['cbc_data'].items():
-                flag_str = f" [{data['flag']}]" if data['flag'] else ""
-                print(f"  {test}: {data['value']} {data['unit']}{flag_str}")
+        sys.stdout.write(buf.getvalue())
 
 if __name__ == "__main__":
     test_universal_extractor()
\ No newline at end of file
@@ -4,11 +4,16 @@ Handles user registration, login, and session management
 """
 
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from .supabase_client import get_supabase, get_supabase_admin
 from datetime import datetime
 import re
+import time
 from typing import Tuple, Dict, List
 
+# How long a session check stays valid before init_auth asks Supabase again
+AUTH_RECHECK_SECONDS = 60
+
 def init_auth():
     """Initialize authentication system and session state"""
     if 'authentication_status' not in st.session_state:
@@ -22,6 +27,14 @@ def init_auth():
     if 'user_data' not in st.session_state:
         st.session_state.user_data = {}
 
+    # Streamlit reruns the script on every interaction; only re-check the
+    # Supabase session (which may refresh the token over the network) when
+    # the last check for this browser session has gone stale
+    checked_at = st.session_state.get('auth_checked_at')
+    if checked_at is not None and time.monotonic() - checked_at < AUTH_RECHECK_SECONDS:
+        return
+    st.session_state.auth_checked_at = time.monotonic()
+
     # Check for existing Supabase session
     try:
         supabase = get_supabase()
@@ -304,6 +317,7 @@ def logout():
         pass
 
     # Clear session state
+    st.session_state.auth_checked_at = None
     st.session_state.authentication_status = None
     st.session_state.username = None
     st.session_state.user_id = None
@@ -396,15 +410,22 @@ def get_user_data(user_id):
     try:
         supabase = get_supabase()
 
-        # Get questionnaires
-        questionnaire_response = supabase.table('questionnaires').select('*').eq('user_id', user_id).order('submitted_at', desc=True).limit(1).execute()
+        questionnaire_query = supabase.table('questionnaires').select('*').eq('user_id', user_id).order('submitted_at', desc=True).limit(1)
+        cbc_query = supabase.table('cbc_results').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(1)
+
+        # The two lookups are independent; run them side by side so the
+        # dashboard waits for one Supabase round-trip instead of two
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            questionnaire_future = executor.submit(questionnaire_query.execute)
+            cbc_future = executor.submit(cbc_query.execute)
+            questionnaire_response = questionnaire_future.result()
+            cbc_response = cbc_future.result()
 
+        # Latest questionnaire
         has_questionnaire = len(questionnaire_response.data) > 0
         latest_questionnaire = questionnaire_response.data[0] if has_questionnaire else None
 
-        # Get CBC results
-        cbc_response = supabase.table('cbc_results').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(1).execute()
-
+        # Latest CBC results
         has_cbc_results = len(cbc_response.data) > 0
         latest_cbc = cbc_response.data[0] if has_cbc_results else None
 
@@ -477,6 +498,29 @@ def save_questionnaire(user_id, questionnaire_data):
 
     return None
 
+def delete_questionnaire(questionnaire_id) -> bool:
+    """
+    Remove a questionnaire whose CBC results could not be saved
+
+    Args:
+        questionnaire_id: ID returned by save_questionnaire
+
+    Returns:
+        bool: True if the delete went through
+    """
+    for client in (get_supabase(), get_supabase_admin()):
+        if client is None:
+            continue
+        try:
+            response = client.table('questionnaires').delete().eq('id', questionnaire_id).execute()
+            # RLS can filter the delete down to zero rows without raising
+            if response.data:
+                return True
+        except Exception as e:
+            print(f"Error deleting questionnaire {questionnaire_id}: {e}")
+
+    return False
+
 def save_cbc_results(user_id, questionnaire_id, extraction_result, cbc_vector, risk_score, detailed_prediction):
     """
     Save CBC results and ML predictions to Supabase
@@ -7,7 +7,7 @@ Features: WBC, NLR, HGB, MCV, PLT, RDW, MONO
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -193,102 +193,153 @@ class CancerClassifier:
 
         is_valid, message = self.validate_input(features)
         if not is_valid:
-            return {
-                'error': message,
-                'prediction': 0,
-                'cancer_probability': 0.0,
-                'confidence': 0.0,
-                'missing_features': missing_features,
-                'imputed_count': imputed_count
-            }
+            return self._invalid_input_result(message, missing_features, imputed_count)
 
         try:
             feature_importance = None
 
             if self.model_loaded and self.model is not None:
-                input_df = pd.DataFrame([features])[self.required_features]
-                prediction_proba = self.model.predict_proba(input_df)[0]
-                cancer_probability = float(prediction_proba[1])
-
-                try:
-                    importances = getattr(self.model, "feature_importances_", None)
-                    if importances is not None:
-                        feature_importance = {
-                            feat: float(imp)
-                            for feat, imp in zip(self.required_features, importances.tolist())
-                        }
-                except Exception:
-                    feature_importance = None
-
+                cancer_probability = self._model_probabilities([features])[0]
+                feature_importance = self._feature_importance()
                 model_used = f"CatBoost ({self.model_version})"
 
             else:
                 cancer_probability = self._simulate_prediction(features)
                 model_used = "Simulation (rule-based)"
 
-            base_confidence = max(cancer_probability, 1 - cancer_probability)
-            confidence_penalty = imputed_count * 0.10
-            adjusted_confidence = max(0.5, base_confidence - confidence_penalty)
-
-            cancer_probability_pct = cancer_probability * 100
+            return self._build_result(features, missing_features, imputed_count,
+                                      cancer_probability, model_used, feature_importance)
 
-            if cancer_probability < 0.10:
-                risk_level, risk_color = "Very Low", "green"
-            elif cancer_probability < 0.30:
-                risk_level, risk_color = "Low", "lightgreen"
-            elif cancer_probability < 0.60:
-                risk_level, risk_color = "Moderate", "orange"
-            elif cancer_probability < 0.80:
-                risk_level, risk_color = "High", "red"
+        except Exception as e:  # pragma: no cover - defensive logging
+            return self._failed_result(e, missing_features, imputed_count)
+
+    def predict_batch(self, features_list: List[Dict]) -> List[Dict]:
+        """Predict several feature dicts, scoring every valid row with one predict_proba call"""
+        if not (self.model_loaded and self.model is not None):
+            return [self.predict(features) for features in features_list]
+
+        results: List[Optional[Dict]] = [None] * len(features_list)
+        pending = []
+        for index, features in enumerate(features_list):
+            missing_features = features.pop('_missing_features', [])
+            imputed_count = features.pop('_imputed_count', 0)
+
+            is_valid, message = self.validate_input(features)
+            if is_valid:
+                pending.append((index, features, missing_features, imputed_count))
             else:
-                risk_level, risk_color = "Very High", "darkred"
-
-            imputation_warning = None
-            if imputed_count > 0:
-                imputation_warning = (
-                    f"Note: {imputed_count} biomarker(s) were missing and estimated using "
-                    f"population averages: {', '.join(missing_features)}. "
-                    f"This may affect prediction accuracy (-{confidence_penalty*100:.0f}% confidence)."
-                )
-
-            result = {
-                'prediction': 1 if cancer_probability > 0.5 else 0,
-                'prediction_label': 'Cancer Risk Detected' if cancer_probability > 0.5 else 'Low Cancer Risk',
-                'cancer_probability': cancer_probability,
-                'cancer_probability_pct': round(cancer_probability_pct, 1),
-                'healthy_probability': 1 - cancer_probability,
-                'confidence': adjusted_confidence,
-                'confidence_pct': round(adjusted_confidence * 100, 1),
-                'risk_level': risk_level,
-                'risk_color': risk_color,
-                'model_used': model_used,
-                'model_loaded': self.model_loaded,
-                'model_load_error': self.model_load_error,
-                'model_path': str(self.model_path),
-                'model_features': features,
-                'missing_features': missing_features,
-                'imputed_count': imputed_count,
-                'imputation_warning': imputation_warning
-            }
-
-            if feature_importance is not None:
-                result['feature_importance'] = feature_importance
-
-            return result
+                results[index] = self._invalid_input_result(message, missing_features, imputed_count)
 
-        except Exception as e:  # pragma: no cover - defensive logging
-            return {
-                'error': f"Prediction failed: {str(e)}",
-                'prediction': 0,
-                'cancer_probability': 0.0,
-                'confidence': 0.0,
-                'missing_features': missing_features,
-                'imputed_count': imputed_count,
-                'model_used': 'Simulation (error)',
-                'model_loaded': self.model_loaded,
-                'model_load_error': self.model_load_error,
-                'model_path': str(self.model_path)
-            }
+        if pending:
+            try:
+                probabilities = self._model_probabilities([features for _, features, _, _ in pending])
+                feature_importance = self._feature_importance()
+                model_used = f"CatBoost ({self.model_version})"
+
+                for (index, features, missing_features, imputed_count), cancer_probability in zip(pending, probabilities):
+                    results[index] = self._build_result(features, missing_features, imputed_count,
+                                                        cancer_probability, model_used, feature_importance)
+            except Exception as e:  # pragma: no cover - defensive logging
+                for index, _, missing_features, imputed_count in pending:
+                    results[index] = self._failed_result(e, missing_features, imputed_count)
+
+        return results
+
+    def _model_probabilities(self, rows: List[Dict]) -> List[float]:
+        # Build the rows directly in model column order; keep float64,
+        # the dtype the ensemble was trained on, so split thresholds match
+        input_df = pd.DataFrame(rows, columns=self.required_features, dtype=np.float64)
+        prediction_proba = self.model.predict_proba(input_df)
+        return [float(row_proba[1]) for row_proba in prediction_proba]
+
+    def _feature_importance(self) -> Optional[Dict]:
+        try:
+            importances = getattr(self.model, "feature_importances_", None)
+            if importances is not None:
+                return {
+                    feat: float(imp)
+                    for feat, imp in zip(self.required_features, importances.tolist())
+                }
+        except Exception:
+            pass
+        return None
+
+    def _build_result(self, features: Dict, missing_features: List[str], imputed_count: int,
+                      cancer_probability: float, model_used: str,
+                      feature_importance: Optional[Dict]) -> Dict:
+        base_confidence = max(cancer_probability, 1 - cancer_probability)
+        confidence_penalty = imputed_count * 0.10
+        adjusted_confidence = max(0.5, base_confidence - confidence_penalty)
+
+        cancer_probability_pct = cancer_probability * 100
+
+        if cancer_probability < 0.10:
+            risk_level, risk_color = "Very Low", "green"
+        elif cancer_probability < 0.30:
+            risk_level, risk_color = "Low", "lightgreen"
+        elif cancer_probability < 0.60:
+            risk_level, risk_color = "Moderate", "orange"
+        elif cancer_probability < 0.80:
+            risk_level, risk_color = "High", "red"
+        else:
+            risk_level, risk_color = "Very High", "darkred"
+
+        imputation_warning = None
+        if imputed_count > 0:
+            imputation_warning = (
+                f"Note: {imputed_count} biomarker(s) were missing and estimated using "
+                f"population averages: {', '.join(missing_features)}. "
+                f"This may affect prediction accuracy (-{confidence_penalty*100:.0f}% confidence)."
+            )
+
+        result = {
+            'prediction': 1 if cancer_probability > 0.5 else 0,
+            'prediction_label': 'Cancer Risk Detected' if cancer_probability > 0.5 else 'Low Cancer Risk',
+            'cancer_probability': cancer_probability,
+            'cancer_probability_pct': round(cancer_probability_pct, 1),
+            'healthy_probability': 1 - cancer_probability,
+            'confidence': adjusted_confidence,
+            'confidence_pct': round(adjusted_confidence * 100, 1),
+            'risk_level': risk_level,
+            'risk_color': risk_color,
+            'model_used': model_used,
+            'model_loaded': self.model_loaded,
+            'model_load_error': self.model_load_error,
+            'model_path': str(self.model_path),
+            'model_features': features,
+            'missing_features': missing_features,
+            'imputed_count': imputed_count,
+            'imputation_warning': imputation_warning
+        }
+
+        if feature_importance is not None:
+            result['feature_importance'] = dict(feature_importance)
+
+        return result
+
+    def _invalid_input_result(self, message: str, missing_features: List[str], imputed_count: int) -> Dict:
+        return {
+            'error': message,
+            'prediction': 0,
+            'cancer_probability': 0.0,
+            'confidence': 0.0,
+            'missing_features': missing_features,
+            'imputed_count': imputed_count
+        }
+
+    def _failed_result(self, error: Exception, missing_features: List[str], imputed_count: int) -> Dict:
+        return {
+            'error': f"Prediction failed: {str(error)}",
+            'prediction': 0,
+            'cancer_probability': 0.0,
+            'confidence': 0.0,
+            'missing_features': missing_features,
+            'imputed_count': imputed_count,
+            'model_used': 'Simulation (error)',
+            'model_loaded': self.model_loaded,
+            'model_load_error': self.model_load_error,
+            'model_path': str(self.model_path)
+        }
 
     def _simulate_prediction(self, features: Dict) -> float:
         normal_ranges = {
@@ -420,8 +471,9 @@ if HAS_STREAMLIT:
     get_classifier = st.cache_resource(get_classifier)
 
 
-def predict_cancer_risk(cbc_data: Dict) -> Dict:
-    classifier = get_classifier()
+def predict_cancer_risk(cbc_data: Dict, classifier: Optional[CancerClassifier] = None) -> Dict:
+    """Predict cancer risk from CBC data, reusing a caller's loaded classifier when given"""
+    classifier = classifier or get_classifier()
     features = classifier.extract_features(cbc_data)
     prediction_result = classifier.predict(features)
 
@@ -430,3 +482,18 @@ def predict_cancer_risk(cbc_data: Dict) -> Dict:
         prediction_result['interpretation'] = interpretation
 
     return prediction_result
+
+
+def predict_cancer_risk_batch(cbc_data_list: List[Dict],
+                              classifier: Optional[CancerClassifier] = None) -> List[Dict]:
+    """Predict cancer risk for several CBC records with one model call"""
+    classifier = classifier or get_classifier()
+    features_list = [classifier.extract_features(cbc_data) for cbc_data in cbc_data_list]
+    prediction_results = classifier.predict_batch(features_list)
+
+    for prediction_result in prediction_results:
+        if 'error' not in prediction_result:
+            interpretation = get_cancer_risk_interpretation(prediction_result['cancer_probability'])
+            prediction_result['interpretation'] = interpretation
+
+    return prediction_results
@@ -8,13 +8,74 @@ import json
 import textwrap
 import sqlite3
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_batch
+from psycopg2.pool import PoolError
 import streamlit as st
 from typing import Dict, List, Optional, Any
 import hashlib
+from contextlib import contextmanager
 from datetime import datetime, date
 
-from .supabase_client import get_supabase, get_supabase_admin
+from .pg_pool import KEEPALIVE_KWARGS, POOL_MAX_CONN, get_pool
+
+# ML prediction columns added to cbc_results by migrations/add_ml_prediction_columns.sql,
+# mapped to their PostgreSQL types
+ML_PREDICTION_COLUMNS = {
+    'model_used': 'VARCHAR(255)',
+    'cancer_probability_pct': 'REAL',
+    'cancer_probability': 'DOUBLE PRECISION',
+    'healthy_probability': 'DOUBLE PRECISION',
+    'confidence_score': 'DOUBLE PRECISION',
+    'confidence_pct': 'REAL',
+    'risk_level': 'VARCHAR(50)',
+    'risk_color': 'VARCHAR(50)',
+    'prediction': 'INTEGER',
+    'prediction_label': 'VARCHAR(100)',
+    'model_loaded': 'BOOLEAN',
+    'model_load_error': 'TEXT',
+}
+
+# cbc_results biomarker columns and the feature keys the cancer classifier expects
+CBC_COLUMN_ALIASES = {
+    'wbc': 'WBC',
+    'nlr': 'NLR',
+    'hgb': 'HGB',
+    'mcv': 'MCV',
+    'plt': 'PLT',
+    'rdw': 'RDW',
+    'mono_abs': 'MONO',
+    'rbc': 'RBC',
+    'hct': 'HCT',
+    'mch': 'MCH',
+    'mchc': 'MCHC',
+    'mpv': 'MPV',
+    'neut_abs': 'NEUT_ABS',
+    'lymph_abs': 'LYMPH_ABS',
+    'eos_abs': 'EOS_ABS',
+    'baso_abs': 'BASO_ABS',
+    'neut_pct': 'NEUT_PCT',
+    'lymph_pct': 'LYMPH_PCT',
+    'mono_pct': 'MONO_PCT',
+    'eos_pct': 'EOS_PCT',
+    'baso_pct': 'BASO_PCT'
+}
+
+# Shared PostgreSQL schema lookup; params are (table_name, list_of_column_names)
+COLUMN_TYPES_QUERY = """
+    SELECT column_name, data_type
+    FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = %s
+    AND column_name = ANY(%s)
+    ORDER BY ordinal_position
+"""
+
+# Same lookup for every column of the table; params are (table_name,)
+TABLE_COLUMN_TYPES_QUERY = """
+    SELECT column_name, data_type
+    FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = %s
+    ORDER BY ordinal_position
+"""
 
 class DatabaseManager:
     """Unified database manager supporting SQLite and PostgreSQL"""
@@ -22,7 +83,9 @@ class DatabaseManager:
     def __init__(self):
         self.db_type = self._detect_database_type()
         self.connection = None
+        self._pg_pool = None
         self._table_columns_cache: Dict[str, List[str]] = {}
+        self._column_types_cache: Dict[tuple, Dict[str, str]] = {}
         
     def _detect_database_type(self) -> str:
         """Detect whether to use SQLite or PostgreSQL based on environment"""
@@ -58,7 +121,13 @@ class DatabaseManager:
         """Get SQLite connection (local development)"""
         db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'users.db')
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        return sqlite3.connect(db_path)
+        conn = sqlite3.connect(db_path)
+        # WAL + NORMAL sync: commits append to the log instead of fsyncing the main file each time
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Rows support both row['column'] and row[0], like RealDictCursor rows on PostgreSQL
+        conn.row_factory = sqlite3.Row
+        return conn
     
     def _get_postgresql_connection(self):
         """Get PostgreSQL connection (Supabase production)"""
@@ -71,22 +140,64 @@ class DatabaseManager:
                 # Fall back to environment variables
                 conn_string = os.getenv('DATABASE_URL') or os.getenv('SUPABASE_URL')
                 
-            return psycopg2.connect(conn_string, cursor_factory=RealDictCursor)
+            # Reuse an open connection from the process-wide pool instead of paying
+            # the TCP + TLS + auth handshake on every query
+            self._pg_pool = get_pool(conn_string, cursor_factory=RealDictCursor)
+            try:
+                return self._checkout_live_connection()
+            except PoolError:
+                # Every pooled connection is checked out; use a one-off connection
+                return psycopg2.connect(conn_string, cursor_factory=RealDictCursor, **KEEPALIVE_KWARGS)
         except Exception as e:
             st.error(f"Failed to connect to PostgreSQL: {e}")
-            # Fall back to SQLite
+            # Fall back to SQLite; its connections must not be handed to the pool
             self.db_type = 'sqlite'
+            self._pg_pool = None
             return self._get_sqlite_connection()
     
+    def _checkout_live_connection(self):
+        """Borrow a pooled connection, discarding any the server dropped while it sat idle"""
+        for _ in range(POOL_MAX_CONN + 1):
+            conn = self._pg_pool.getconn()
+            if self._is_connection_alive(conn):
+                return conn
+            self._pg_pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("No live PostgreSQL connection available in the pool")
+    
+    @staticmethod
+    def _is_connection_alive(conn) -> bool:
+        """Ping a pooled connection; conn.closed alone misses server-side disconnects"""
+        if conn.closed:
+            return False
+        try:
+            # One round-trip; the transaction it opens is the one the caller's statements join
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+    
+    def release_connection(self, conn):
+        """Return a connection from get_connection: pooled ones go back to the pool, others are closed"""
+        if self._pg_pool is not None and not isinstance(conn, sqlite3.Connection):
+            try:
+                self._pg_pool.putconn(conn, close=bool(conn.closed))
+                return
+            except PoolError:
+                # Overflow connection, not owned by the pool
+                pass
+        conn.close()
+    
     def execute_query(self, query: str, params: tuple = None, fetch: str = None):
-        """Execute a query with unified interface for both databases"""
+        """Execute a query with unified interface for both databases
+        
+        Fetched rows are always plain dicts keyed by column name, whichever
+        backend is in use.
+        """
         conn = self.get_connection()
         
         try:
-            if self.db_type == 'postgresql':
-                cursor = conn.cursor()
-            else:
-                cursor = conn.cursor()
+            cursor = conn.cursor()
                 
             if params:
                 cursor.execute(query, params)
@@ -94,9 +205,10 @@ class DatabaseManager:
                 cursor.execute(query)
             
             if fetch == 'all':
-                result = cursor.fetchall()
+                result = [dict(row) for row in cursor.fetchall()]
             elif fetch == 'one':
-                result = cursor.fetchone()
+                row = cursor.fetchone()
+                result = dict(row) if row is not None else None
             else:
                 result = None
                 
@@ -107,7 +219,54 @@ class DatabaseManager:
             conn.rollback()
             raise e
         finally:
-            conn.close()
+            self.release_connection(conn)
+    
+    def execute_query_iter(self, query: str, params: tuple = None, chunk_size: int = 1000):
+        """Yield rows one at a time as plain dicts, fetching them from the server in chunks"""
+        conn = self.get_connection()
+        
+        try:
+            if self.db_type == 'postgresql':
+                # Named cursors are server-side, so only chunk_size rows are held at a time
+                cursor = conn.cursor(name='execute_query_iter')
+                cursor.itersize = chunk_size
+            else:
+                cursor = conn.cursor()
+                cursor.arraysize = chunk_size
+            
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from (dict(row) for row in rows)
+            
+            cursor.close()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release_connection(conn)
+    
+    @contextmanager
+    def transaction(self):
+        """Yield a cursor whose statements share one connection and commit together"""
+        conn = self.get_connection()
+        
+        try:
+            cursor = conn.cursor()
+            yield cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release_connection(conn)
     
     def create_tables(self):
         """Create all required tables with proper schema for both databases"""
@@ -138,6 +297,7 @@ class DatabaseManager:
                     q8_chronic_conditions TEXT,
                     q9_exercise_frequency VARCHAR(20),
                     q10_stress_level VARCHAR(20),
+                    submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
                 """,
@@ -224,6 +384,7 @@ class DatabaseManager:
                     q8_chronic_conditions TEXT,
                     q9_exercise_frequency TEXT,
                     q10_stress_level TEXT,
+                    submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (user_id) REFERENCES users (id)
                 )
@@ -288,12 +449,41 @@ class DatabaseManager:
                 """
             ]
         
-        for query in queries:
-            try:
-                self.execute_query(query)
-                print(f"✅ Table created successfully")
-            except Exception as e:
-                print(f"❌ Error creating table: {e}")
+        # Neither database indexes foreign keys on its own; the history and
+        # dashboard queries filter by user_id and take the newest row
+        # (same index set as supabase/migrations/004_add_latest_result_indexes.sql)
+        indexes = [
+            "CREATE INDEX IF NOT EXISTS idx_questionnaires_user_submitted ON questionnaires(user_id, submitted_at DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_cbc_results_user_created ON cbc_results(user_id, created_at DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_cbc_results_questionnaire_id ON cbc_results(questionnaire_id)",
+            # Superseded by the composites above (earlier versions of this list
+            # and the Supabase migrations created them)
+            "DROP INDEX IF EXISTS idx_questionnaires_user_id",
+            "DROP INDEX IF EXISTS idx_cbc_results_user_id",
+        ]
+        
+        # Questionnaire tables created before submitted_at was part of the local
+        # schema need the column before its index can be built (SQLite cannot
+        # add a column with a non-constant default)
+        upgrades = []
+        questionnaire_columns = self.get_table_columns('questionnaires')
+        self._table_columns_cache.pop('questionnaires', None)
+        if questionnaire_columns and 'submitted_at' not in questionnaire_columns:
+            default = " DEFAULT CURRENT_TIMESTAMP" if self.db_type == 'postgresql' else ""
+            upgrades.append(f"ALTER TABLE questionnaires ADD COLUMN submitted_at TIMESTAMP{default}")
+        
+        # Send all DDL in one batch on one connection instead of a round-trip per table
+        ddl = ";\n".join(query.strip() for query in queries + upgrades + indexes) + ";"
+        try:
+            with self.transaction() as cursor:
+                if self.db_type == 'postgresql':
+                    cursor.execute(ddl)
+                else:
+                    # executescript autocommits each statement unless wrapped explicitly
+                    cursor.executescript(f"BEGIN IMMEDIATE;\n{ddl}\nCOMMIT;")
+            print(f"✅ {len(queries)} tables created successfully")
+        except Exception as e:
+            print(f"❌ Error creating tables: {e}")
 
     def get_table_columns(self, table_name: str) -> List[str]:
         """Return list of column names for a table, caching results per session."""
@@ -314,24 +504,12 @@ class DatabaseManager:
                     """,
                     (table_name,)
                 )
-                rows = cursor.fetchall()
-                for row in rows:
-                    if isinstance(row, dict):
-                        columns.append(row.get('column_name'))
-                    else:
-                        columns.append(row[0])
+                columns = [row['column_name'] for row in cursor.fetchall()]
             else:
                 cursor.execute(f"PRAGMA table_info({table_name})")
-                rows = cursor.fetchall()
-                for row in rows:
-                    if isinstance(row, dict):
-                        col_name = row.get('name')
-                    else:
-                        col_name = row[1] if len(row) > 1 else None
-                    if col_name:
-                        columns.append(col_name)
+                columns = [row['name'] for row in cursor.fetchall()]
         finally:
-            conn.close()
+            self.release_connection(conn)
 
         self._table_columns_cache[table_name] = columns
         return columns
@@ -340,6 +518,47 @@ class DatabaseManager:
         """Check if a specific column exists on a table."""
         return column_name in self.get_table_columns(table_name)
 
+    def add_cached_columns(self, table_name: str, column_names: List[str]):
+        """Record columns added by a migration so the cached schema stays current without re-querying."""
+        columns = self.get_table_columns(table_name)
+        columns.extend(name for name in column_names if name not in columns)
+        self._column_types_cache = {
+            key: value for key, value in self._column_types_cache.items() if key[0] != table_name
+        }
+
+    def get_column_types(self, table_name: str, column_names=None) -> Dict[str, str]:
+        """Return {column_name: data_type} for a table, optionally limited to column_names.
+
+        Results are cached per session, keyed by table and requested column set.
+        """
+        cache_key = (table_name, frozenset(column_names) if column_names is not None else None)
+        if cache_key in self._column_types_cache:
+            return self._column_types_cache[cache_key]
+
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            if self.db_type == 'postgresql':
+                if column_names is None:
+                    cursor.execute(TABLE_COLUMN_TYPES_QUERY, (table_name,))
+                else:
+                    cursor.execute(COLUMN_TYPES_QUERY, (table_name, list(column_names)))
+                column_types = {row['column_name']: row['data_type'] for row in cursor.fetchall()}
+                if column_names is None:
+                    # The full listing doubles as the table's column list
+                    self._table_columns_cache.setdefault(table_name, list(column_types))
+            else:
+                cursor.execute(f"PRAGMA table_info({table_name})")
+                column_types = {
+                    row['name']: row['type'] for row in cursor.fetchall()
+                    if column_names is None or row['name'] in column_names
+                }
+        finally:
+            self.release_connection(conn)
+
+        self._column_types_cache[cache_key] = column_types
+        return column_types
+
 # Global database manager instance
 _db_manager = None
 
@@ -356,6 +575,12 @@ def init_database():
     db.create_tables()
     return db.db_type
 
+def parse_json_field(value: Any) -> Any:
+    """Decode a JSON column value; JSONB already arrives decoded from psycopg2"""
+    if isinstance(value, (str, bytes, bytearray)):
+        return json.loads(value)
+    return value
+
 # User management functions
 def hash_password(password: str) -> str:
     """Hash password for secure storage"""
@@ -388,16 +613,7 @@ def authenticate_user(username: str, password: str) -> Optional[Dict]:
             fetch='one'
         )
         
-        if user:
-            if db.db_type == 'postgresql':
-                return dict(user)
-            else:
-                return {
-                    'id': user[0],
-                    'username': user[1], 
-                    'email': user[2]
-                }
-        return None
+        return user
     except Exception as e:
         print(f"Error authenticating user: {e}")
         return None
@@ -520,6 +736,9 @@ def save_cbc_data(user_id: Any, questionnaire_id: Any, cbc_data: Dict,
 
         if db.db_type == 'postgresql':
             # Attempt to insert via Supabase REST interface first to handle UUID casting and RLS
+            # Imported here so scripts that only need SQL don't pay for the supabase client stack
+            from .supabase_client import get_supabase, get_supabase_admin
+
             supabase_clients: List[Any] = []
 
             try:
@@ -561,29 +780,19 @@ def save_cbc_data(user_id: Any, questionnaire_id: Any, cbc_data: Dict,
             # Fallback to direct PostgreSQL insert if Supabase clients are unavailable
             query = base_query + " RETURNING id"
             result = db.execute_query(query, values, fetch='one')
-            if isinstance(result, dict):
-                return result.get('id')
-            return result[0] if result else None
+            return result['id'] if result else None
         else:
-            db.execute_query(base_query, values)
-            result = db.execute_query("SELECT last_insert_rowid() as id", fetch='one')
-            if isinstance(result, dict):
-                return result.get('id')
-            return result[0] if result else None
+            # lastrowid is per-connection, so read it from the inserting cursor
+            with db.transaction() as cursor:
+                cursor.execute(base_query, values)
+                return cursor.lastrowid
 
     except Exception as e:
         print(f"Error saving CBC data: {e}")
         return None
 
-def update_cbc_predictions(cbc_result_id: int, prediction_results: Dict) -> bool:
-    """
-    Update CBC record with ML predictions
-    Args:
-        cbc_result_id: ID of the cbc_results record
-        prediction_results: Dict with cancer_probability, risk_level, etc.
-    """
-    db = get_db_manager()
-
+def _prediction_column_values(db: DatabaseManager, prediction_results: Dict) -> List[tuple]:
+    """Map a prediction result onto (column, value) pairs for the cbc_results columns that exist"""
     table_name = 'cbc_results'
 
     def column_exists(column: str) -> bool:
@@ -629,6 +838,20 @@ def update_cbc_predictions(cbc_result_id: int, prediction_results: Dict) -> bool
     if model_features is not None:
         add_column_if_exists('cbc_vector', json.dumps(model_features))
 
+    return column_values
+
+def update_cbc_predictions(cbc_result_id: int, prediction_results: Dict) -> bool:
+    """
+    Update CBC record with ML predictions
+    Args:
+        cbc_result_id: ID of the cbc_results record
+        prediction_results: Dict with cancer_probability, risk_level, etc.
+    """
+    db = get_db_manager()
+
+    table_name = 'cbc_results'
+    column_values = _prediction_column_values(db, prediction_results)
+
     if not column_values:
         print("No matching prediction columns to update in cbc_results")
         return False
@@ -638,6 +861,8 @@ def update_cbc_predictions(cbc_result_id: int, prediction_results: Dict) -> bool
         if db.db_type == 'postgresql':
             record = {column: value for column, value in column_values}
 
+            from .supabase_client import get_supabase, get_supabase_admin
+
             supabase_clients: List[Any] = []
             try:
                 client = get_supabase()
@@ -676,6 +901,76 @@ def update_cbc_predictions(cbc_result_id: int, prediction_results: Dict) -> bool
         print(f"Error updating CBC predictions: {e}")
         return False
 
+def update_cbc_predictions_batch(updates: List[tuple]) -> int:
+    """
+    Update many CBC records with ML predictions in one transaction
+    Args:
+        updates: (cbc_result_id, prediction_results) pairs
+    Returns: number of records updated (0 if the transaction failed);
+        ids with no cbc_results row are not counted
+    """
+    db = get_db_manager()
+    placeholder = "%s" if db.db_type == 'postgresql' else "?"
+
+    # One statement per column layout (error results carry fewer columns)
+    statements: Dict[tuple, List[tuple]] = {}
+    for cbc_result_id, prediction_results in updates:
+        column_values = _prediction_column_values(db, prediction_results)
+        if column_values:
+            columns = tuple(column for column, _ in column_values)
+            params = tuple(value for _, value in column_values) + (cbc_result_id,)
+            statements.setdefault(columns, []).append(params)
+    if not statements:
+        return 0
+
+    try:
+        with db.transaction() as cursor:
+            # execute_batch leaves only the last page's rowcount on the cursor,
+            # so look up which ids exist and count those instead
+            ids = list({params[-1] for rows in statements.values() for params in rows})
+            cursor.execute(
+                f"SELECT id FROM cbc_results WHERE id IN ({', '.join([placeholder] * len(ids))})",
+                tuple(ids)
+            )
+            existing_ids = {row['id'] for row in cursor.fetchall()}
+            for columns, rows in statements.items():
+                set_clause = ', '.join(f"{column} = {placeholder}" for column in columns)
+                query = f"UPDATE cbc_results SET {set_clause} WHERE id = {placeholder}"
+                if db.db_type == 'postgresql':
+                    # Sends the rows in pages instead of one round-trip per UPDATE
+                    execute_batch(cursor, query, rows)
+                else:
+                    cursor.executemany(query, rows)
+        return sum(params[-1] in existing_ids for rows in statements.values() for params in rows)
+
+    except Exception as e:
+        print(f"Error updating CBC predictions: {e}")
+        return 0
+
+def build_cbc_result_record(cbc_result_id: int, cbc_data: Dict, prediction_results: Dict,
+                            metadata: Optional[Dict[str, Any]] = None) -> Dict:
+    """
+    Rebuild the cbc_results row written by save_cbc_data + update_cbc_predictions
+    Lets callers refresh cached user data from what they just wrote instead of re-reading it
+    Args:
+        cbc_data: Feature-keyed values as returned by get_cbc_data_for_prediction
+    """
+    db = get_db_manager()
+    feature_columns = {feature: column for column, feature in CBC_COLUMN_ALIASES.items()}
+    metadata = metadata or {}
+
+    record = {
+        'id': cbc_result_id,
+        'created_at': datetime.now().isoformat(),
+        'filename': metadata.get('filename'),
+    }
+    record.update(
+        (feature_columns.get(key, key.lower()), value)
+        for key, value in (cbc_data or {}).items()
+    )
+    record.update(_prediction_column_values(db, prediction_results))
+    return record
+
 def get_cbc_data_for_prediction(cbc_result_id: int) -> Dict:
     """
     Retrieve CBC data from database for ML prediction
@@ -686,7 +981,7 @@ def get_cbc_data_for_prediction(cbc_result_id: int) -> Dict:
     try:
         placeholder = "%s" if db.db_type == 'postgresql' else "?"
         query = textwrap.dedent(f"""
-            SELECT wbc, nlr, hgb, mcv, plt, rdw, mono_abs as mono,
+            SELECT wbc, nlr, hgb, mcv, plt, rdw, mono_abs,
                    rbc, hct, mch, mchc, mpv,
                    neut_abs, lymph_abs, eos_abs, baso_abs,
                    neut_pct, lymph_pct, mono_pct, eos_pct, baso_pct
@@ -699,30 +994,6 @@ def get_cbc_data_for_prediction(cbc_result_id: int) -> Dict:
         if not result:
             return None
 
-        column_aliases = {
-            'wbc': 'WBC',
-            'nlr': 'NLR',
-            'hgb': 'HGB',
-            'mcv': 'MCV',
-            'plt': 'PLT',
-            'rdw': 'RDW',
-            'mono': 'MONO',
-            'rbc': 'RBC',
-            'hct': 'HCT',
-            'mch': 'MCH',
-            'mchc': 'MCHC',
-            'mpv': 'MPV',
-            'neut_abs': 'NEUT_ABS',
-            'lymph_abs': 'LYMPH_ABS',
-            'eos_abs': 'EOS_ABS',
-            'baso_abs': 'BASO_ABS',
-            'neut_pct': 'NEUT_PCT',
-            'lymph_pct': 'LYMPH_PCT',
-            'mono_pct': 'MONO_PCT',
-            'eos_pct': 'EOS_PCT',
-            'baso_pct': 'BASO_PCT'
-        }
-
         def coerce(value):
             if value is None:
                 return None
@@ -731,21 +1002,10 @@ def get_cbc_data_for_prediction(cbc_result_id: int) -> Dict:
             except (TypeError, ValueError):
                 return value
 
-        if isinstance(result, dict):
-            normalized = {}
-            for key, value in result.items():
-                alias = column_aliases.get(key.lower(), key.upper())
-                normalized[alias] = coerce(value)
-            return normalized
-        else:
-            # SQLite returns tuple, map to column names
-            columns = [
-                'WBC', 'NLR', 'HGB', 'MCV', 'PLT', 'RDW', 'MONO',
-                'RBC', 'HCT', 'MCH', 'MCHC', 'MPV',
-                'NEUT_ABS', 'LYMPH_ABS', 'EOS_ABS', 'BASO_ABS',
-                'NEUT_PCT', 'LYMPH_PCT', 'MONO_PCT', 'EOS_PCT', 'BASO_PCT'
-            ]
-            return {col: coerce(val) for col, val in zip(columns, result)}
+        return {
+            CBC_COLUMN_ALIASES.get(key.lower(), key.upper()): coerce(value)
+            for key, value in result.items()
+        }
         
     except Exception as e:
         print(f"Error retrieving CBC data: {e}")
@@ -795,20 +1055,7 @@ def get_user_cbc_history(user_id: int) -> List[Dict]:
             fetch='all'
         )
         
-        if db.db_type == 'postgresql':
-            return [dict(row) for row in results] if results else []
-        else:
-            # Convert SQLite rows to dicts
-            columns = [
-                'id', 'user_id', 'questionnaire_id', 'test_date', 'file_format', 'extraction_method',
-                'wbc', 'rbc', 'hgb', 'hct', 'mcv', 'mch', 'mchc', 'rdw', 'plt', 'mpv',
-                'neut_abs', 'lymph_abs', 'mono_abs', 'eos_abs', 'baso_abs',
-                'neut_pct', 'lymph_pct', 'mono_pct', 'eos_pct', 'baso_pct',
-                'nlr', 'nrbc_abs', 'nrbc_pct',
-                'cancer_probability', 'prediction_label', 'risk_level', 'confidence_score',
-                'missing_biomarkers', 'imputed_count', 'imputation_warning', 'created_at'
-            ]
-            return [dict(zip(columns, row)) for row in results] if results else []
+        return results
             
     except Exception as e:
         print(f"Error getting CBC history: {e}")
@@ -17,6 +17,8 @@ def extract_cbc_from_pdf(uploaded_file) -> Dict:
     """
     try:
         from universal_carnetsante_extractor import UniversalCarnetSanteExtractor
+        import os
+        import shutil
         import sys
         import tempfile
         from pathlib import Path
@@ -26,9 +28,11 @@ def extract_cbc_from_pdf(uploaded_file) -> Dict:
         if str(parent_dir) not in sys.path:
             sys.path.insert(0, str(parent_dir))
         
-        # Save uploaded file to temp location
+        # Save uploaded file to temp location in chunks rather than
+        # materialising a second in-memory copy of the whole upload
+        uploaded_file.seek(0)
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(uploaded_file.read())
+            shutil.copyfileobj(uploaded_file, tmp_file, 64 * 1024)
             tmp_path = tmp_file.name
         
         # Reset file pointer for potential re-reading
@@ -37,7 +41,11 @@ def extract_cbc_from_pdf(uploaded_file) -> Dict:
         extractor = UniversalCarnetSanteExtractor()
         
         # Extract CBC data from PDF
-        result = extractor.extract_from_pdf(tmp_path)
+        try:
+            result = extractor.extract_from_pdf(tmp_path)
+        finally:
+            # Clean up temp file, also when extraction fails
+            os.unlink(tmp_path)
         cbc_data = result.get('cbc_data', {})
         
         # Normalize all numeric values (extractor might return dicts with 'value' keys)
@@ -64,10 +72,6 @@ def extract_cbc_from_pdf(uploaded_file) -> Dict:
                 print(f"🔧 Converting HGB from {cbc_data['HGB']} g/dL to {cbc_data['HGB'] * 10} g/L")
                 cbc_data['HGB'] = cbc_data['HGB'] * 10
         
-        # Clean up temp file
-        import os
-        os.unlink(tmp_path)
-        
         return cbc_data
         
     except Exception as e:
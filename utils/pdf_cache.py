@@ -0,0 +1,45 @@
+"""
+Opt-in disk cache for PDF text extraction.
+Set RIZOME_PDF_CACHE_DIR to enable it while iterating on the parsers locally;
+when unset (as in the deployed app) extraction always reads the PDF, so
+uploaded lab reports are never written to disk.
+"""
+
+import os
+from functools import lru_cache
+
+from .pdf_io import PDF_BACKEND, extract_pdf_text
+
+# Bump when utils/pdf_io changes the text it produces (the active backend is
+# part of the cache key as well, since each one lays text out differently)
+EXTRACTOR_VERSION = 1
+
+CACHE_DIR_ENV = 'RIZOME_PDF_CACHE_DIR'
+
+
+def _extract_pdf_text_keyed(file_path: str, mtime: float, size: int,
+                            version: int, backend: str, separator: str) -> str:
+    """Extraction keyed on file identity so edited PDFs miss the cache"""
+    return extract_pdf_text(file_path, separator)
+
+
+@lru_cache(maxsize=None)
+def _get_cached_extractor(cache_dir: str):
+    """Return the joblib-memoized extractor for a cache directory"""
+    # Imported here so the default (uncached) path never loads joblib/numpy
+    from joblib import Memory
+    
+    memory = Memory(location=cache_dir, verbose=0)
+    return memory.cache(_extract_pdf_text_keyed)
+
+
+def cached_extract_pdf_text(file_path: str, separator: str = "\n") -> str:
+    """Return the PDF text, served from the disk cache when it is enabled"""
+    cache_dir = os.getenv(CACHE_DIR_ENV)
+    if not cache_dir:
+        return extract_pdf_text(file_path, separator)
+    
+    stat = os.stat(file_path)
+    extractor = _get_cached_extractor(cache_dir)
+    return extractor(os.path.abspath(file_path), stat.st_mtime, stat.st_size,
+                     EXTRACTOR_VERSION, PDF_BACKEND, separator)
@@ -7,11 +7,12 @@ import re
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
-import PyPDF2
 from pathlib import Path
 import json
 from datetime import datetime
 
+from .pdf_cache import cached_extract_pdf_text
+
 class LabValueMapping:
     """Handles mapping between different lab report naming conventions"""
     
@@ -97,6 +98,19 @@ class LabValueMapping:
             r'basophil.*rel|basophil.*%': 'BASO_PCT'
         }
         
+        # All alternative patterns folded into one regex so a test name is
+        # scanned once. Each branch is anchored with a lazy prefix, which keeps
+        # the first-listed pattern winning exactly like the ordered loop did.
+        # The prefix spells out [\s\S] instead of using re.DOTALL, so a '.'
+        # inside a pattern still stops at a newline as it did with re.search.
+        self._pattern_names = list(self.pattern_mapping.values())
+        self._pattern_re = re.compile(
+            '|'.join(
+                f'(?:[\\s\\S]*?(?P<p{i}>{pattern}))'
+                for i, pattern in enumerate(self.pattern_mapping)
+            )
+        )
+        
         # Unit normalization
         self.unit_conversions = {
             'g/dL': {'to_g/L': 10.0},
@@ -114,10 +128,9 @@ class LabValueMapping:
             return self.carnetsante_mapping[test_name]
         
         # Pattern matching
-        test_lower = test_name.lower()
-        for pattern, standard_name in self.pattern_mapping.items():
-            if re.search(pattern, test_lower):
-                return standard_name
+        match = self._pattern_re.match(test_name.lower())
+        if match:
+            return self._pattern_names[int(match.lastgroup[1:])]
         
         return None
 
@@ -136,6 +149,43 @@ class LabValueMapping:
 class CarnetSanteExtractor:
     """Specialized extractor for CarnetSante lab reports"""
     
+    # All patterns are compiled once here; add new ones as class attributes
+    # rather than calling re.search with a pattern string inside a method.
+    NAME_RE = re.compile(r'PATIENT EXTERNE\s+([A-Z]+,\s*[A-Z]+)')
+    DOB_RE = re.compile(r'NÈ\(e\)/DOB:\s*(\d{4}/\d{2}/\d{2})')
+    AGE_RE = re.compile(r'Age:\s*(\d+)')
+    SEX_RE = re.compile(r'Sex\(e\):\s*([MF])')
+    COLLECTED_RE = re.compile(r'PRÈLEVÈ/COLLECTED\s*(\d{4}/\d{2}/\d{2}\s*\d{2}:\d{2})')
+    
+    # "GB WBC 5.87 10^9/L 4.50-11.00 RADVS"
+    CBC_BASIC_RE = re.compile(r'^([A-Z]+)\s+([A-Z]+)\s+([0-9\.]+)\s*([LH]?)\s*([a-zA-Z0-9\^\\/]*)\s+([0-9\.\-]+)\s*([A-Z]*)')
+    # "Neutrophiles abs. Auto 3.72 10^9/L 1.80-7.70 RADVS"
+    CBC_ABS_RE = re.compile(r'^([A-Za-z]+)\s+abs\.\s+Auto\s+([0-9\.]+)\s*([LH]?)\s*([a-zA-Z0-9\^\\/]*)\s+([0-9\.\-]+)\s*([A-Z]*)')
+    # "Neutrophiles Rel. 63.31 % 40.00-70.00 RADVS"
+    CBC_REL_RE = re.compile(r'^([A-Za-z]+)\s+Rel\.\s+([0-9\.]+)\s*([LH]?)\s*%\s+([0-9\.\-]+)\s*([A-Z]*)')
+    # "DVE RDW 13.3 12.7-16.0 RADVS"
+    CBC_NO_UNIT_RE = re.compile(r'^([A-Z]+)\s+([A-Z]+)\s+([0-9\.]+)\s+([0-9\.\-]+)\s*([A-Z]*)')
+    # "NRBC abs. Auto 0.00 10^9/L RADVS"
+    CBC_NRBC_RE = re.compile(r'^(NRBC)\s+(abs|Rel)\.\s+Auto\s+([0-9\.]+)\s*([a-zA-Z0-9\^\\/\%]*)\s*([A-Z]*)')
+    
+    COLLECTION_TIME_RES = (
+        re.compile(r'PRÈLEVÈ/COLLECTED\s*(\d{4}/\d{2}/\d{2}\s*\d{2}:\d{2})'),
+        re.compile(r'Collection.*?(\d{4}-\d{2}-\d{2}\s*\d{2}:\d{2})'),
+        re.compile(r'(\d{4}/\d{2}/\d{2}\s*\d{2}:\d{2})'),
+    )
+    
+    ADDITIONAL_TEST_RES = {
+        'GLUCOSE': re.compile(r'GLUCOSE\s+([0-9\.]+)\s*([a-zA-Z\/]+)'),
+        'CREATININE': re.compile(r'CREATININE\s+([0-9\.]+)\s*([a-zA-Z\/]+)'),
+        'SODIUM': re.compile(r'SODIUM\s+([0-9\.]+)\s*([a-zA-Z\/]+)'),
+        'POTASSIUM': re.compile(r'POTASSIUM\s+([0-9\.]+)\s*([a-zA-Z\/]+)'),
+        'CHOLESTEROL': re.compile(r'CHOLESTEROL\s+([0-9\.]+)\s*([a-zA-Z\/]+)'),
+        'TSH': re.compile(r'TSH\s+([0-9\.]+)\s*([a-zA-Z\/]+)'),
+        'B12': re.compile(r'VIT B12\s+([0-9\.]+)\s*([a-zA-Z\/]+)'),
+        'FERRITIN': re.compile(r'FERRITINE\s+([0-9\.]+)\s*([a-zA-Z\/]+)'),
+        'HBA1C': re.compile(r'HBA1C\s+([0-9\.]+)\s*([%])'),
+    }
+    
     def __init__(self):
         self.mapping = LabValueMapping()
         
@@ -144,26 +194,26 @@ class CarnetSanteExtractor:
         patient_info = {}
         
         # Patient name
-        name_match = re.search(r'PATIENT EXTERNE\s+([A-Z]+,\s*[A-Z]+)', text)
+        name_match = self.NAME_RE.search(text)
         if name_match:
             patient_info['name'] = name_match.group(1)
         
         # Date of birth and age
-        dob_match = re.search(r'NÈ\(e\)/DOB:\s*(\d{4}/\d{2}/\d{2})', text)
+        dob_match = self.DOB_RE.search(text)
         if dob_match:
             patient_info['dob'] = dob_match.group(1)
         
-        age_match = re.search(r'Age:\s*(\d+)', text)
+        age_match = self.AGE_RE.search(text)
         if age_match:
             patient_info['age'] = int(age_match.group(1))
         
         # Sex
-        sex_match = re.search(r'Sex\(e\):\s*([MF])', text)
+        sex_match = self.SEX_RE.search(text)
         if sex_match:
             patient_info['sex'] = sex_match.group(1)
         
         # Collection date
-        collected_match = re.search(r'PRÈLEVÈ/COLLECTED\s*(\d{4}/\d{2}/\d{2}\s*\d{2}:\d{2})', text)
+        collected_match = self.COLLECTED_RE.search(text)
         if collected_match:
             patient_info['collection_date'] = collected_match.group(1)
         
@@ -176,6 +226,9 @@ class CarnetSanteExtractor:
         # Split text into lines for easier processing
         lines = text.split('\n')
         
+        # Same for every value in the report, so look it up once
+        collection_timestamp = self._extract_collection_time(text)
+        
         # Find hematology section
         in_hematology = False
         found_fsc_cbc = False
@@ -201,27 +254,28 @@ class CarnetSanteExtractor:
                 continue
             
             # Skip header lines
-            if any(x in line for x in ['ANALYSE(S)', 'TEST(S)', 'RÉSULTAT', 'RESULT', 'FLAG', 'UNITS', 'REF.RANGE']):
+            if ('ANALYSE(S)' in line or 'TEST(S)' in line or 'RÉSULTAT' in line or 'RESULT' in line
+                    or 'FLAG' in line or 'UNITS' in line or 'REF.RANGE' in line):
                 continue
             
             # Debug: print line for troubleshooting
             print(f"Processing CBC line: {line}")
             
             # CarnetSante specific patterns based on the actual PDF format
-            # Pattern 1: Basic CBC values like "GB WBC 5.87 10^9/L 4.50-11.00 RADVS"
-            match1 = re.search(r'^([A-Z]+)\s+([A-Z]+)\s+([0-9\.]+)\s*([LH]?)\s*([a-zA-Z0-9\^\\/]*)\s+([0-9\.\-]+)\s*([A-Z]*)', line)
+            # Pattern 1: Basic CBC values
+            match1 = self.CBC_BASIC_RE.search(line)
             
-            # Pattern 2: Differential counts with "abs." like "Neutrophiles abs. Auto 3.72 10^9/L 1.80-7.70 RADVS"
-            match2 = re.search(r'^([A-Za-z]+)\s+abs\.\s+Auto\s+([0-9\.]+)\s*([LH]?)\s*([a-zA-Z0-9\^\\/]*)\s+([0-9\.\-]+)\s*([A-Z]*)', line)
+            # Pattern 2: Differential counts with "abs."
+            match2 = self.CBC_ABS_RE.search(line)
             
-            # Pattern 3: Relative percentages like "Neutrophiles Rel. 63.31 % 40.00-70.00 RADVS"
-            match3 = re.search(r'^([A-Za-z]+)\s+Rel\.\s+([0-9\.]+)\s*([LH]?)\s*%\s+([0-9\.\-]+)\s*([A-Z]*)', line)
+            # Pattern 3: Relative percentages
+            match3 = self.CBC_REL_RE.search(line)
             
-            # Pattern 4: Special cases like "DVE RDW 13.3 12.7-16.0 RADVS"
-            match4 = re.search(r'^([A-Z]+)\s+([A-Z]+)\s+([0-9\.]+)\s+([0-9\.\-]+)\s*([A-Z]*)', line)
+            # Pattern 4: Special cases without a unit
+            match4 = self.CBC_NO_UNIT_RE.search(line)
             
-            # Pattern 5: NRBC special format like "NRBC abs. Auto 0.00 10^9/L RADVS"
-            match5 = re.search(r'^(NRBC)\s+(abs|Rel)\.\s+Auto\s+([0-9\.]+)\s*([a-zA-Z0-9\^\\/\%]*)\s*([A-Z]*)', line)
+            # Pattern 5: NRBC special format
+            match5 = self.CBC_NRBC_RE.search(line)
             
             match = match1 or match2 or match3 or match4 or match5
             
@@ -284,7 +338,7 @@ class CarnetSanteExtractor:
                             'flag': flag,
                             'reference_range': reference_range,
                             'original_name': test_name,
-                            'collection_timestamp': self._extract_collection_time(text)
+                            'collection_timestamp': collection_timestamp
                         }
                         print(f"✓ Extracted: {test_name} -> {standard_name} = {value} {unit}")
                     else:
@@ -312,14 +366,8 @@ class CarnetSanteExtractor:
     def _extract_collection_time(self, text: str) -> str:
         """Extract collection timestamp from PDF"""
         # Look for collection date/time patterns
-        patterns = [
-            r'PRÈLEVÈ/COLLECTED\s*(\d{4}/\d{2}/\d{2}\s*\d{2}:\d{2})',
-            r'Collection.*?(\d{4}-\d{2}-\d{2}\s*\d{2}:\d{2})',
-            r'(\d{4}/\d{2}/\d{2}\s*\d{2}:\d{2})'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in self.COLLECTION_TIME_RES:
+            match = pattern.search(text)
             if match:
                 return match.group(1)
         
@@ -329,21 +377,10 @@ class CarnetSanteExtractor:
         """Extract additional biochemistry and other tests"""
         additional_tests = {}
         
-        # Common additional tests to extract
-        test_patterns = {
-            'GLUCOSE': r'GLUCOSE\s+([0-9\.]+)\s*([a-zA-Z\/]+)',
-            'CREATININE': r'CREATININE\s+([0-9\.]+)\s*([a-zA-Z\/]+)',
-            'SODIUM': r'SODIUM\s+([0-9\.]+)\s*([a-zA-Z\/]+)',
-            'POTASSIUM': r'POTASSIUM\s+([0-9\.]+)\s*([a-zA-Z\/]+)',
-            'CHOLESTEROL': r'CHOLESTEROL\s+([0-9\.]+)\s*([a-zA-Z\/]+)',
-            'TSH': r'TSH\s+([0-9\.]+)\s*([a-zA-Z\/]+)',
-            'B12': r'VIT B12\s+([0-9\.]+)\s*([a-zA-Z\/]+)',
-            'FERRITIN': r'FERRITINE\s+([0-9\.]+)\s*([a-zA-Z\/]+)',
-            'HBA1C': r'HBA1C\s+([0-9\.]+)\s*([%])',
-        }
         
-        for test_name, pattern in test_patterns.items():
-            match = re.search(pattern, text)
+        # Common additional tests to extract
+        for test_name, pattern in self.ADDITIONAL_TEST_RES.items():
+            match = pattern.search(text)
             if match:
                 additional_tests[test_name] = {
                     'value': float(match.group(1)),
@@ -371,11 +408,7 @@ class UniversalLabExtractor:
     def extract_from_pdf(self, file_path: str) -> Dict:
         """Extract data from PDF file"""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
+            text = cached_extract_pdf_text(file_path, separator="")
             
             return self.extract_from_text(text, file_path)
         
@@ -422,44 +455,37 @@ class UniversalLabExtractor:
         
         return extraction_result
 
+# Standard CBC features we expect, with the default used when one is missing
+STANDARD_CBC_FEATURES = {
+    'WBC': {'default': 7.0, 'unit': '10^9/L'},
+    'RBC': {'default': 4.5, 'unit': '10^12/L'},
+    'HGB': {'default': 140, 'unit': 'g/L'},
+    'HCT': {'default': 0.42, 'unit': 'L'},
+    'MCV': {'default': 90, 'unit': 'fL'},
+    'MCH': {'default': 30, 'unit': 'pg'},
+    'MCHC': {'default': 340, 'unit': 'g/L'},
+    'RDW': {'default': 13.5, 'unit': '%'},
+    'PLT': {'default': 250, 'unit': '10^9/L'},
+    'MPV': {'default': 9.0, 'unit': 'fL'},
+    'NEUT_ABS': {'default': 4.0, 'unit': '10^9/L'},
+    'NEUT_PCT': {'default': 60, 'unit': '%'},
+    'LYMPH_ABS': {'default': 2.0, 'unit': '10^9/L'},
+    'LYMPH_PCT': {'default': 30, 'unit': '%'},
+    'MONO_ABS': {'default': 0.5, 'unit': '10^9/L'},
+    'MONO_PCT': {'default': 7, 'unit': '%'},
+    'EOS_ABS': {'default': 0.2, 'unit': '10^9/L'},
+    'EOS_PCT': {'default': 3, 'unit': '%'},
+    'BASO_ABS': {'default': 0.1, 'unit': '10^9/L'},
+    'BASO_PCT': {'default': 1, 'unit': '%'},
+    'NLR': {'default': 2.0, 'unit': 'ratio'}
+}
+
 def create_standardized_cbc_vector(cbc_data: Dict) -> Dict:
     """Create standardized CBC feature vector for ML processing"""
-    
-    # Standard CBC features we expect
-    standard_features = {
-        'WBC': {'default': 7.0, 'unit': '10^9/L'},
-        'RBC': {'default': 4.5, 'unit': '10^12/L'},
-        'HGB': {'default': 140, 'unit': 'g/L'},
-        'HCT': {'default': 0.42, 'unit': 'L'},
-        'MCV': {'default': 90, 'unit': 'fL'},
-        'MCH': {'default': 30, 'unit': 'pg'},
-        'MCHC': {'default': 340, 'unit': 'g/L'},
-        'RDW': {'default': 13.5, 'unit': '%'},
-        'PLT': {'default': 250, 'unit': '10^9/L'},
-        'MPV': {'default': 9.0, 'unit': 'fL'},
-        'NEUT_ABS': {'default': 4.0, 'unit': '10^9/L'},
-        'NEUT_PCT': {'default': 60, 'unit': '%'},
-        'LYMPH_ABS': {'default': 2.0, 'unit': '10^9/L'},
-        'LYMPH_PCT': {'default': 30, 'unit': '%'},
-        'MONO_ABS': {'default': 0.5, 'unit': '10^9/L'},
-        'MONO_PCT': {'default': 7, 'unit': '%'},
-        'EOS_ABS': {'default': 0.2, 'unit': '10^9/L'},
-        'EOS_PCT': {'default': 3, 'unit': '%'},
-        'BASO_ABS': {'default': 0.1, 'unit': '10^9/L'},
-        'BASO_PCT': {'default': 1, 'unit': '%'},
-        'NLR': {'default': 2.0, 'unit': 'ratio'}
+    return {
+        feature: cbc_data[feature]['value'] if feature in cbc_data else info['default']
+        for feature, info in STANDARD_CBC_FEATURES.items()
     }
-    
-    standardized_vector = {}
-    
-    for feature, info in standard_features.items():
-        if feature in cbc_data:
-            standardized_vector[feature] = cbc_data[feature]['value']
-        else:
-            # Use default value if not found
-            standardized_vector[feature] = info['default']
-    
-    return standardized_vector
 
 def test_extraction():
     """Test the extraction on the CarnetSante sample"""
@@ -0,0 +1,82 @@
+"""
+PDF text extraction shared by the CarnetSante extractors.
+Uses PyPDF2 by default: the extractors' line-position heuristics were tuned to
+its text layout. Set RIZOME_PDF_BACKEND=pymupdf or pdfium to try the faster
+MuPDF (C) or PDFium (C++) readers when installed; their layout differs, so
+they are opt-in until the extraction fixtures pass with them.
+"""
+
+import os
+from typing import List
+
+import PyPDF2
+
+try:
+    import fitz
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+try:
+    import pypdfium2 as pdfium
+    HAS_PDFIUM = True
+except ImportError:
+    HAS_PDFIUM = False
+
+BACKEND_ENV = 'RIZOME_PDF_BACKEND'
+
+_AVAILABLE_BACKENDS = {
+    'pypdf2': True,
+    'pymupdf': HAS_PYMUPDF,
+    'pdfium': HAS_PDFIUM,
+}
+
+_requested_backend = os.getenv(BACKEND_ENV, 'pypdf2').strip().lower()
+if _AVAILABLE_BACKENDS.get(_requested_backend):
+    PDF_BACKEND = _requested_backend
+else:
+    # Unknown or not installed; stay on the reference backend
+    PDF_BACKEND = 'pypdf2'
+
+
+def _page_texts_pymupdf(file_path: str) -> List[str]:
+    """Extract per-page text with PyMuPDF"""
+    with fitz.open(file_path) as doc:
+        return [page.get_text("text") for page in doc]
+
+
+def _page_texts_pdfium(file_path: str) -> List[str]:
+    """Extract per-page text with PDFium"""
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        texts = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            # PDFium emits CRLF line breaks; the parsers split on '\n'
+            texts.append(textpage.get_text_range().replace('\r\n', '\n'))
+            textpage.close()
+            page.close()
+        return texts
+    finally:
+        pdf.close()
+
+
+def _page_texts_pypdf2(file_path: str) -> List[str]:
+    """Extract per-page text with PyPDF2"""
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [page.extract_text() or '' for page in pdf_reader.pages]
+
+
+def extract_page_texts(file_path: str) -> List[str]:
+    """Return the text of every page in the PDF"""
+    if PDF_BACKEND == 'pymupdf':
+        return _page_texts_pymupdf(file_path)
+    if PDF_BACKEND == 'pdfium':
+        return _page_texts_pdfium(file_path)
+    return _page_texts_pypdf2(file_path)
+
+
+def extract_pdf_text(file_path: str, separator: str = "\n") -> str:
+    """Return the full text of the PDF with pages joined by separator"""
+    return separator.join(extract_page_texts(file_path))
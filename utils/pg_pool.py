@@ -0,0 +1,55 @@
+"""
+PostgreSQL Connection Pool
+Process-wide psycopg2 pools so repeated Supabase connections reuse an open
+socket instead of paying the TCP + TLS + auth handshake every time
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from psycopg2.pool import ThreadedConnectionPool
+
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 10
+
+# TCP keepalives so idle pooled connections to Supabase are not silently
+# dropped by NATs/load balancers (libpq already sets TCP_NODELAY itself)
+KEEPALIVE_KWARGS = {
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3,
+}
+
+# One pool per distinct connection target (dsn + connect kwargs)
+_pools: Dict[tuple, ThreadedConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(dsn: Optional[str] = None, **connect_kwargs) -> ThreadedConnectionPool:
+    """Get or lazily create the pool for a connection target"""
+    connect_kwargs = {**KEEPALIVE_KWARGS, **connect_kwargs}
+    key = (dsn, tuple(sorted(connect_kwargs.items())))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ThreadedConnectionPool(POOL_MIN_CONN, POOL_MAX_CONN, dsn, **connect_kwargs)
+                _pools[key] = pool
+    return pool
+
+
+@contextmanager
+def pooled_connection(dsn: Optional[str] = None, **connect_kwargs):
+    """Borrow a connection from the pool and hand it back when done
+
+    Connections that were closed while borrowed are discarded rather than reused.
+    """
+    pool = get_pool(dsn, **connect_kwargs)
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
@@ -42,6 +42,8 @@ def get_supabase_client() -> Client:
 # Global client instance (lazy loaded)
 _supabase_client = None
 _supabase_admin_client = None
+# Set once the admin lookup has run, so a missing service key is not re-resolved on every call
+_supabase_admin_resolved = False
 
 def get_supabase() -> Client:
     """Get cached Supabase client instance"""
@@ -54,8 +56,8 @@ def get_supabase() -> Client:
 def get_supabase_admin() -> Optional[Client]:
     """Get Supabase client authenticated with service role key (if available)."""
 
-    global _supabase_admin_client
-    if _supabase_admin_client is not None:
+    global _supabase_admin_client, _supabase_admin_resolved
+    if _supabase_admin_resolved:
         return _supabase_admin_client
 
     url = None
@@ -84,6 +86,8 @@ def get_supabase_admin() -> Optional[Client]:
             or os.getenv('SUPABASE_SECRET_KEY')
         )
 
+    _supabase_admin_resolved = True
+
     if not url or not service_key:
         return None
 